@@ -1,8 +1,33 @@
 from .smart_reader import (
     smart_read_url,
+    smart_read_urls,
     format_for_obsidian,
     STRATEGY_ORDER,
-    PLATFORM_STRATEGY_MAP
+    PLATFORM_STRATEGY_MAP,
+    PLATFORM_HEDGE_DELAY,
+    available_strategies,
+    HOST_CONCURRENCY,
+    STRATEGY_CONCURRENCY
+)
+from .strategy_stats import (
+    StrategyStats,
+    get_strategy_stats
+)
+from .circuit_breaker import (
+    CircuitBreaker,
+    get_circuit_breaker
+)
+from .content_cache import (
+    ContentCache,
+    get_content_cache,
+    PLATFORM_CACHE_TTL
+)
+from .concurrency import ConcurrencyLimiter
+from .scheduler import (
+    PriorityScheduler,
+    get_scheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BULK
 )
 from .obsidian_sync import (
     sync_to_obsidian,
@@ -13,9 +38,31 @@ from .obsidian_sync import (
 __all__ = [
     # 智能读取
     'smart_read_url',
+    'smart_read_urls',
     'format_for_obsidian',
     'STRATEGY_ORDER',
     'PLATFORM_STRATEGY_MAP',
+    'PLATFORM_HEDGE_DELAY',
+    'available_strategies',
+    'HOST_CONCURRENCY',
+    'STRATEGY_CONCURRENCY',
+    # 策略统计
+    'StrategyStats',
+    'get_strategy_stats',
+    # 熔断器
+    'CircuitBreaker',
+    'get_circuit_breaker',
+    # 内容缓存
+    'ContentCache',
+    'get_content_cache',
+    'PLATFORM_CACHE_TTL',
+    # 并发限制
+    'ConcurrencyLimiter',
+    # 优先级调度
+    'PriorityScheduler',
+    'get_scheduler',
+    'PRIORITY_INTERACTIVE',
+    'PRIORITY_BULK',
     # Obsidian 同步
     'sync_to_obsidian',
     'sync_read_result_to_obsidian',
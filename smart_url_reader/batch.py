@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+批量读取任务
+从 URL 列表并发读取并保存结果；已完成的 URL 追加写入日志文件，
+中断后重新运行同一命令即可从断点继续，失败的 URL 写入重试文件
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Set, TextIO, Tuple
+
+from .smart_reader import smart_read_urls, format_for_obsidian
+from .obsidian_sync import sync_to_obsidian, generate_filename
+from url_utils import canonicalize_url, DedupIndex
+
+
+# 非终端输出时，每完成多少个 URL 打印一次进度
+PROGRESS_EVERY = 50
+
+# 终端进度刷新的最短间隔（秒）
+PROGRESS_INTERVAL = 0.2
+
+# 完成日志与重试文件的默认后缀
+JOURNAL_SUFFIX = '.journal'
+RETRY_SUFFIX = '.failed'
+
+# 从标准输入读取列表时的默认文件名前缀
+STDIN_BATCH_NAME = 'smart_reader_batch'
+
+
+def iter_url_list(lines: Iterable[str]) -> Iterator[str]:
+    """
+    从 URL 列表中逐行读取 URL
+
+    每行取第一个字段，其余内容（如重试文件中的错误信息）忽略；
+    空行与 # 开头的注释行跳过。
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        yield line.split(None, 1)[0]
+
+
+def read_url_list(path: str) -> List[str]:
+    """读取 URL 列表文件（'-' 表示标准输入），去重并保持顺序"""
+    if path == '-':
+        return list(dict.fromkeys(iter_url_list(sys.stdin)))
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(dict.fromkeys(iter_url_list(f)))
+
+
+def default_batch_paths(list_path: str) -> Tuple[str, str]:
+    """
+    列表文件对应的默认 (完成日志, 重试文件) 路径
+
+    输入本身是重试文件（urls.txt.failed）时沿用原任务的 urls.txt.journal 与 urls.txt.failed，
+    重试成功的 URL 记入原任务的完成日志，仍失败的 URL 写回同一个重试文件。
+    """
+    base = STDIN_BATCH_NAME if list_path == '-' else list_path
+    if base.endswith(RETRY_SUFFIX) and len(base) > len(RETRY_SUFFIX):
+        base = base[:-len(RETRY_SUFFIX)]
+    return base + JOURNAL_SUFFIX, base + RETRY_SUFFIX
+
+
+class BatchJournal:
+    """
+    追加写入的完成日志（JSONL，每行一个已成功的 URL）
+
+    每条记录写入后立即 flush，进程中断时已完成的记录不会丢失；
+    最后一行不完整（写入时被中断）时忽略该行。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed: Set[str] = set()
+        self._load()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and entry.get('url'):
+                    self.completed.add(entry['url'])
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.completed
+
+    def record(self, url: str, result: Dict[str, Any], saved_to: Optional[str] = None) -> None:
+        """记录一个已完成的 URL"""
+        entry = {
+            'url': url,
+            'strategy': result.get('strategy'),
+            'platform': result.get('platform'),
+            'saved_to': saved_to,
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self.completed.add(url)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _Progress:
+    """批量任务进度与吞吐量显示（输出到标准错误）"""
+
+    def __init__(self, total: int, skipped: int, stream: TextIO = sys.stderr):
+        self.total = total
+        self.skipped = skipped
+        self.stream = stream
+        self.succeeded = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._last_draw = 0.0
+        self._interactive = stream.isatty()
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+
+    def update(self, success: bool) -> None:
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+        now = time.monotonic()
+        if self._interactive:
+            if now - self._last_draw >= PROGRESS_INTERVAL or self.done == self.total:
+                self._last_draw = now
+                self.stream.write('\r' + self._line() + '\033[K')
+                self.stream.flush()
+        elif self.done % PROGRESS_EVERY == 0 or self.done == self.total:
+            print(self._line(), file=self.stream)
+
+    def clear(self) -> None:
+        """清除终端上的进度行（打印其他内容前调用）"""
+        if self._interactive:
+            self.stream.write('\r\033[K')
+
+    def _line(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        rate = self.done / elapsed
+        remaining = self.total - self.done
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else '-'
+        return (
+            f"[{self.done}/{self.total}] 成功 {self.succeeded} 失败 {self.failed} | "
+            f"{rate:.2f} 个/秒 | 剩余约 {eta}"
+        )
+
+    def finish(self) -> None:
+        if self._interactive and self.done:
+            self.stream.write('\n')
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        print(
+            f"完成 {self.done}/{self.total}（成功 {self.succeeded}，失败 {self.failed}，"
+            f"跳过已完成 {self.skipped}），用时 {elapsed:.1f} 秒，{rate:.2f} 个/秒",
+            file=self.stream
+        )
+
+
+def _unique_filename(directory: str, result: Dict[str, Any]) -> str:
+    """生成不与已有文件重名的文件名（不含扩展名）"""
+    title = result.get('title', '') or result.get('og_title', '') or '未命名'
+    base = generate_filename(title, result.get('source', ''))
+    filename = base
+    counter = 2
+    while os.path.exists(os.path.join(directory, filename + '.md')):
+        filename = f"{base} ({counter})"
+        counter += 1
+    return filename
+
+
+def _save_result(
+    result: Dict[str, Any],
+    vault: Optional[str],
+    folder: str,
+    output_dir: Optional[str]
+) -> Tuple[Optional[str], Optional[str]]:
+    """保存读取结果，返回 (保存路径, 错误信息)；未指定保存位置时只读取不保存"""
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        filename = _unique_filename(output_dir, result)
+        path = os.path.join(output_dir, filename + '.md')
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(format_for_obsidian(result))
+        except OSError as e:
+            return None, f"保存文件失败: {e}"
+        return path, None
+
+    if vault:
+        folder_path = os.path.join(vault, folder)
+        filename = _unique_filename(folder_path, result)
+        success, error = sync_to_obsidian(
+            content=format_for_obsidian(result),
+            vault_path=vault,
+            folder=folder,
+            filename=filename
+        )
+        if not success:
+            return None, f"同步到 Obsidian 失败: {error}"
+        return os.path.join(folder_path, filename + '.md'), None
+
+    return None, None
+
+
+def _read_retry_lines(path: str) -> List[str]:
+    """读取已有重试文件的有效行（不存在时返回空列表）"""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            lines = f.readlines()
+    except OSError:
+        return []
+    return [
+        line if line.endswith('\n') else line + '\n'
+        for line in lines
+        if line.strip() and not line.lstrip().startswith('#')
+    ]
+
+
+def _replace_retry_file(tmp_path: str, path: str) -> None:
+    """用临时文件替换重试文件；没有失败的 URL 时删除两者"""
+    if os.path.getsize(tmp_path) > 0:
+        os.replace(tmp_path, path)
+        return
+    os.remove(tmp_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def run_batch(
+    urls: List[str],
+    journal_path: str,
+    retry_path: str,
+    concurrency: int = 8,
+    vault: Optional[str] = None,
+    folder: str = 'Clippings',
+    output_dir: Optional[str] = None,
+    verbose: bool = False,
+    dedup_path: Optional[str] = None,
+    **options: Any
+) -> Tuple[int, int]:
+    """
+    批量读取并保存
+
+    Args:
+        urls: URL 列表
+        journal_path: 完成日志路径；日志中已有的 URL 跳过
+        retry_path: 本次失败的 URL 及错误信息（制表符分隔），可直接作为下次的输入；
+            先写入临时文件，结束时再替换，中断时保留旧文件中本次尚未读取的 URL
+        concurrency: 并发数
+        vault / folder: 同步到 Obsidian
+        output_dir: 保存为 Markdown 文件的目录（优先于 vault）
+        verbose: 逐条打印结果
+        dedup_path: 去重索引（SQLite）路径，跨任务跳过规范 URL 已成功读取过的内容；
+            None 时只在本次任务内去重
+        **options: 传给 smart_read_urls 的其他参数
+
+    Returns:
+        Tuple[成功数, 失败数]
+    """
+    journal = BatchJournal(journal_path)
+    dedup = DedupIndex(dedup_path)
+    # 按规范 URL 去重：跳过同一内容的不同链接（跟踪参数、移动端域名等）与已完成的 URL
+    completed = {canonicalize_url(url) for url in journal.completed}
+    pending = [url for url in dedup.filter_new(urls) if canonicalize_url(url) not in completed]
+    progress = _Progress(len(pending), len(urls) - len(pending))
+
+    # 重试文件可能就是本次的输入（重试上次的失败），读取完成后才替换
+    tmp_retry_path = f"{retry_path}.{os.getpid()}.tmp"
+    retry_file = open(tmp_retry_path, 'w', encoding='utf-8')
+    attempted: Set[str] = set()
+    finished = False
+    results = smart_read_urls(pending, concurrency=concurrency, **options)
+    try:
+        for url, result, error in results:
+            attempted.add(url)
+            saved_to = None
+            if error is None:
+                saved_to, error = _save_result(result, vault, folder, output_dir)
+
+            if error is None:
+                journal.record(url, result, saved_to)
+                # 成功后才记入去重索引，失败的 URL 下次仍会重试
+                dedup.add(url)
+            else:
+                # 错误信息压成一行，保证重试文件每行一个 URL
+                error = ' '.join(str(error).split())
+                retry_file.write(f"{url}\t{error}\n")
+                retry_file.flush()
+
+            if verbose:
+                progress.clear()
+                mark = '✓' if error is None else '✗'
+                print(f"{mark} {url}" + (f" -> {error}" if error else ''), file=sys.stderr)
+
+            progress.update(error is None)
+        finished = True
+    finally:
+        results.close()
+        if not finished:
+            # 中断：旧重试文件中本次还没轮到的 URL 继续保留
+            for line in _read_retry_lines(retry_path):
+                url = line.split(None, 1)[0]
+                if url not in attempted and url not in journal:
+                    retry_file.write(line)
+        retry_file.close()
+        journal.close()
+        dedup.close()
+        progress.finish()
+        _replace_retry_file(tmp_retry_path, retry_path)
+
+    return progress.succeeded, progress.failed
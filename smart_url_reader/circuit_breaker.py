@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+策略熔断器
+按 (策略, 主机名) 统计连续失败，失败过多时暂时跳过该策略
+"""
+
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple
+
+
+# 连续失败多少次后熔断
+FAILURE_THRESHOLD = 3
+
+# 熔断后多久（秒）进入半开状态，放行一次试探请求
+COOLDOWN_SECONDS = 60.0
+
+# 熔断器状态
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+BreakerKey = Tuple[str, str]
+
+
+class CircuitBreaker:
+    """
+    按 (策略, 主机名) 维度的熔断器（线程安全）
+
+    - closed: 正常放行，连续失败达到 failure_threshold 次后转为 open
+    - open: 直接拒绝，经过 cooldown 秒后转为 half_open
+    - half_open: 只放行一个试探请求，成功则恢复 closed，失败则重新 open
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        cooldown: float = COOLDOWN_SECONDS
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self._entries: Dict[BreakerKey, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: BreakerKey) -> Dict[str, Any]:
+        return self._entries.setdefault(key, {
+            'state': STATE_CLOSED,
+            'failures': 0,
+            'opened_at': 0.0,
+            'probing': False,
+        })
+
+    def allow(self, strategy: str, host: Optional[str]) -> Tuple[bool, float]:
+        """
+        判断是否放行
+
+        Returns:
+            (是否放行, 距离下次试探的剩余秒数)
+        """
+        key = (strategy, host or '')
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(key)
+            if entry['state'] == STATE_CLOSED:
+                return True, 0.0
+
+            if entry['state'] == STATE_OPEN:
+                remaining = entry['opened_at'] + self.cooldown - now
+                if remaining > 0:
+                    return False, remaining
+                entry['state'] = STATE_HALF_OPEN
+                entry['probing'] = False
+
+            # 半开状态只放行一个试探请求
+            if entry['probing']:
+                return False, 0.0
+            entry['probing'] = True
+            return True, 0.0
+
+    def record_success(self, strategy: str, host: Optional[str]) -> None:
+        """记录成功，熔断器恢复 closed"""
+        with self._lock:
+            entry = self._entry((strategy, host or ''))
+            entry.update(state=STATE_CLOSED, failures=0, probing=False)
+
+    def record_failure(self, strategy: str, host: Optional[str]) -> None:
+        """记录失败，连续失败达到阈值或试探失败时熔断"""
+        with self._lock:
+            entry = self._entry((strategy, host or ''))
+            entry['failures'] += 1
+            if entry['state'] == STATE_HALF_OPEN or entry['failures'] >= self.failure_threshold:
+                entry.update(state=STATE_OPEN, opened_at=time.monotonic(), probing=False)
+
+    def release(self, strategy: str, host: Optional[str]) -> None:
+        """请求未发出（如被本地限流拒绝）：不计成败，归还半开状态的试探名额"""
+        with self._lock:
+            entry = self._entries.get((strategy, host or ''))
+            if entry:
+                entry['probing'] = False
+
+    def state(self, strategy: str, host: Optional[str]) -> str:
+        """返回当前状态（closed / open / half_open）"""
+        with self._lock:
+            entry = self._entries.get((strategy, host or ''))
+            return entry['state'] if entry else STATE_CLOSED
+
+    def reset(self) -> None:
+        """清空所有熔断状态"""
+        with self._lock:
+            self._entries.clear()
+
+
+_default_breaker: Optional[CircuitBreaker] = None
+_default_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """获取进程内共享的默认熔断器"""
+    global _default_breaker
+    with _default_breaker_lock:
+        if _default_breaker is None:
+            _default_breaker = CircuitBreaker()
+        return _default_breaker
@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from smart_url_reader import smart_read_url, format_for_obsidian
 from smart_url_reader.obsidian_sync import sync_read_result_to_obsidian
+# batch 只在批量模式下导入；守护进程只导入轻量的客户端（不含 http.server 与服务端），保持 CLI 启动速度
 
 
 def main():
@@ -21,7 +22,30 @@ def main():
         description='URL 智能读取器 - 一键抓取网页内容并同步到 Obsidian'
     )
 
-    parser.add_argument('url', help='要抓取的网页 URL')
+    parser.add_argument('url', nargs='?', help='要抓取的网页 URL')
+    parser.add_argument(
+        '--batch', '-b',
+        metavar='FILE',
+        help='批量模式：从文件读取 URL 列表（每行一个，- 表示标准输入）'
+    )
+    parser.add_argument(
+        '--concurrency', '-j',
+        type=int,
+        default=8,
+        help='批量模式的并发数（默认: 8）'
+    )
+    parser.add_argument(
+        '--journal',
+        help='批量模式的完成日志，用于中断后继续（默认: <列表文件>.journal；输入为 <列表文件>.failed 时沿用原任务的日志）'
+    )
+    parser.add_argument(
+        '--dedup-db',
+        help='批量模式的去重索引（SQLite），跨任务跳过规范 URL 相同且已成功读取的内容（默认只在本次任务内去重）'
+    )
+    parser.add_argument(
+        '--retry-file',
+        help='批量模式中失败的 URL 及错误信息（默认: <列表文件>.failed）'
+    )
     parser.add_argument(
         '--vault', '-v',
         default=os.environ.get('OBSIDIAN_VAULT_PATH'),
@@ -38,13 +62,38 @@ def main():
         nargs='+',
         help='指定读取策略（默认自动选择）'
     )
+    parser.add_argument(
+        '--hedge',
+        action='store_true',
+        help='对冲模式：前一个策略迟迟未返回时并行启动下一个策略'
+    )
+    parser.add_argument(
+        '--no-adaptive',
+        action='store_true',
+        help='不根据历史成功率调整策略顺序'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='不读写本地内容缓存'
+    )
+    parser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='忽略已有缓存，重新抓取并更新缓存'
+    )
+    parser.add_argument(
+        '--no-daemon',
+        action='store_true',
+        help='不使用守护进程，直接在本进程读取'
+    )
     parser.add_argument(
         '--storage-state',
         help='Playwright 登录态文件路径'
     )
     parser.add_argument(
         '--output', '-o',
-        help='输出到指定文件（不同步到 Obsidian）'
+        help='输出到指定文件（不同步到 Obsidian）；批量模式下为输出目录'
     )
     parser.add_argument(
         '--verbose', '-V',
@@ -54,6 +103,14 @@ def main():
 
     args = parser.parse_args()
 
+    if args.batch:
+        if args.url:
+            parser.error('批量模式（--batch）不能同时指定 url')
+        sys.exit(run_batch_mode(args))
+
+    if not args.url:
+        parser.error('请指定 url，或使用 --batch 批量读取')
+
     # 验证 URL
     if not args.url.startswith(('http://', 'https://')):
         print(f"错误: 无效的 URL: {args.url}")
@@ -63,12 +120,31 @@ def main():
     if args.verbose:
         print(f"开始读取: {args.url}")
 
-    result, error = smart_read_url(
-        url=args.url,
-        strategies=args.strategy,
-        storage_state=args.storage_state,
-        verbose=args.verbose
-    )
+    read_options = {
+        'strategies': args.strategy,
+        # 守护进程的工作目录可能不同，传绝对路径
+        'storage_state': os.path.abspath(args.storage_state) if args.storage_state else None,
+        'hedge': args.hedge,
+        'adaptive': not args.no_adaptive,
+        'use_cache': not args.no_cache,
+        'refresh': args.refresh,
+    }
+
+    # 守护进程运行时通过它读取（浏览器与连接已就绪），否则在本进程读取
+    via_daemon = False
+    if not args.no_daemon:
+        from smart_url_reader.daemon_client import read_via_daemon, DaemonUnavailable
+        try:
+            result, error = read_via_daemon(args.url, **read_options)
+            via_daemon = True
+        except DaemonUnavailable:
+            pass
+
+    if via_daemon:
+        if args.verbose:
+            print("通过守护进程读取")
+    else:
+        result, error = smart_read_url(url=args.url, verbose=args.verbose, **read_options)
 
     if error:
         print(f"读取失败: {error}")
@@ -77,7 +153,7 @@ def main():
     if args.verbose:
         print(f"\n读取成功!")
         print(f"  平台: {result.get('platform', '未知')}")
-        print(f"  策略: {result.get('strategy', '未知')}")
+        print(f"  策略: {result.get('strategy', '未知')}" + ("（缓存）" if result.get('cached') else ""))
         print(f"  标题: {result.get('title', 'N/A')[:60]}...")
         print(f"  内容长度: {len(result.get('content', ''))} 字符")
 
@@ -114,5 +190,50 @@ def main():
         print("\n提示: 使用 --vault 参数同步到 Obsidian，或 --output 保存到文件")
 
 
+def run_batch_mode(args) -> int:
+    """批量模式，返回退出码"""
+    from smart_url_reader.batch import run_batch, read_url_list, default_batch_paths
+
+    try:
+        urls = read_url_list(args.batch)
+    except OSError as e:
+        print(f"读取 URL 列表失败: {e}")
+        return 1
+
+    default_journal, default_retry = default_batch_paths(args.batch)
+    journal_path = args.journal or default_journal
+    retry_path = args.retry_file or default_retry
+
+    if not args.output and not args.vault:
+        print("提示: 未指定 --vault 或 --output，只读取（写入缓存）不保存", file=sys.stderr)
+
+    try:
+        _, failed = run_batch(
+            urls,
+            journal_path=journal_path,
+            retry_path=retry_path,
+            concurrency=args.concurrency,
+            vault=args.vault,
+            folder=args.folder,
+            output_dir=args.output,
+            verbose=args.verbose,
+            dedup_path=args.dedup_db,
+            strategies=args.strategy,
+            storage_state=args.storage_state,
+            hedge=args.hedge,
+            adaptive=not args.no_adaptive,
+            use_cache=not args.no_cache,
+            refresh=args.refresh
+        )
+    except KeyboardInterrupt:
+        print(f"已中断，重新运行同一命令即可从断点继续（完成日志: {journal_path}）", file=sys.stderr)
+        return 130
+
+    if failed:
+        print(f"失败的 URL 已写入: {retry_path}（可直接作为 --batch 的输入重试）", file=sys.stderr)
+        return 1
+    return 0
+
+
 if __name__ == '__main__':
     main()
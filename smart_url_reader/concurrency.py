@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+并发限制
+按键（主机名、策略名）限制同时进行的请求数，供批量读取使用
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Iterator
+
+
+class ConcurrencyLimiter:
+    """
+    按键计数的并发限制器（线程安全）
+
+    每个键的上限取 limits[key]，未配置的键取 default；default 为 None 时不限制。
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, int]] = None,
+        default: Optional[int] = None
+    ):
+        self.limits = dict(limits or {})
+        self.default = default
+        self._active: Dict[str, int] = {}
+        self._cond = threading.Condition()
+
+    def limit(self, key: str) -> Optional[int]:
+        """键的并发上限，None 表示不限制"""
+        limit = self.limits.get(key, self.default)
+        return None if limit is None else max(1, limit)
+
+    def _has_capacity(self, key: str) -> bool:
+        limit = self.limit(key)
+        return limit is None or self._active.get(key, 0) < limit
+
+    def try_acquire(self, key: str) -> bool:
+        """有空位时占用并返回 True，否则立即返回 False"""
+        with self._cond:
+            if not self._has_capacity(key):
+                return False
+            self._active[key] = self._active.get(key, 0) + 1
+            return True
+
+    def acquire(self, key: str, timeout: Optional[float] = None) -> bool:
+        """等待空位并占用，超时返回 False"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._has_capacity(key), timeout):
+                return False
+            self._active[key] = self._active.get(key, 0) + 1
+            return True
+
+    def release(self, key: str) -> None:
+        """释放一个空位"""
+        with self._cond:
+            count = self._active.get(key, 0) - 1
+            if count > 0:
+                self._active[key] = count
+            else:
+                self._active.pop(key, None)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, key: str) -> Iterator[None]:
+        """with 语句中占用一个空位"""
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def active(self, key: Optional[str] = None) -> int:
+        """指定键（或全部键）当前占用的数量"""
+        with self._cond:
+            if key is None:
+                return sum(self._active.values())
+            return self._active.get(key, 0)
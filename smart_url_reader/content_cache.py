@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+内容缓存
+将 smart_read_url 的读取结果保存到本地 SQLite，支持按平台设置有效期与 LRU 淘汰
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional, Dict, Any
+
+# 添加上级目录到路径，以便导入其他模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_utils import canonicalize_url
+
+
+# 默认缓存文件路径，可通过 SMART_READER_CACHE_PATH 环境变量修改
+DEFAULT_CACHE_PATH = os.environ.get(
+    'SMART_READER_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'cody_tools', 'content_cache.sqlite3')
+)
+
+# 缓存总大小上限（字节），超过后按最近访问时间淘汰
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# 默认有效期（秒）
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+
+# 平台有效期（秒）：文章类内容基本不变，商品/视频页变化较快
+PLATFORM_CACHE_TTL = {
+    '微信公众号': 30 * 24 * 3600,
+    '知乎': 7 * 24 * 3600,
+    '小红书': 7 * 24 * 3600,
+    'B站': 3 * 24 * 3600,
+    '抖音': 24 * 3600,
+    '淘宝': 6 * 3600,
+    '京东': 6 * 3600,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    platform TEXT,
+    strategy TEXT,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+"""
+
+
+# 随每次请求变化、不写入缓存的结果字段
+_REQUEST_FIELDS = ('cached', 'fetched_at', 'short_url')
+
+
+def cache_key(url: str) -> str:
+    """缓存键：规范 URL，同一内容的不同分享链接共用一条缓存"""
+    return canonicalize_url(url)
+
+
+class ContentCache:
+    """
+    基于 SQLite 的读取结果缓存（线程安全）
+
+    - 以规范化后的 URL 为键，保存结果字典、策略、抓取时间与过期时间
+    - 过期条目读取时视为未命中
+    - 总大小超过 max_bytes 时按最近访问时间淘汰（LRU）
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """读取未过期的缓存结果，未命中返回 None"""
+        key = cache_key(url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, fetched_at, expires_at FROM entries WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            result_json, fetched_at, expires_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+
+        try:
+            result = json.loads(result_json)
+        except ValueError:
+            return None
+        result['cached'] = True
+        result['fetched_at'] = fetched_at
+        return result
+
+    def put(
+        self,
+        url: str,
+        result: Dict[str, Any],
+        ttl: Optional[float] = None
+    ) -> None:
+        """写入缓存；ttl 默认按平台取 PLATFORM_CACHE_TTL"""
+        platform = result.get('platform')
+        if ttl is None:
+            ttl = PLATFORM_CACHE_TTL.get(platform, DEFAULT_CACHE_TTL)
+        if ttl <= 0:
+            return
+
+        # 只保存内容本身；是否命中、短链接等随每次请求变化的字段不写入
+        stored = {k: v for k, v in result.items() if k not in _REQUEST_FIELDS}
+        result_json = json.dumps(stored, ensure_ascii=False, default=str)
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, url, platform, strategy, fetched_at, expires_at, last_access, size, result) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(url), url, platform, result.get('strategy'),
+                 now, now + ttl, now, len(result_json.encode('utf-8')), result_json)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """删除过期条目，并按 LRU 淘汰到 max_bytes 以内（需持有锁）"""
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def invalidate(self, url: str) -> None:
+        """删除指定 URL 的缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (cache_key(url),))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回条目数与总大小"""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {'entries': count, 'bytes': total, 'max_bytes': self.max_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: Optional[ContentCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> ContentCache:
+    """获取进程内共享的默认缓存"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ContentCache()
+        return _default_cache
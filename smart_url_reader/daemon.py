@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+URL 智能读取器守护进程
+常驻后台，通过本机 HTTP 接口提供读取与同步服务；启动时预先导入读取后端并打开缓存，
+浏览器池与 HTTP 连接池在首个请求时创建，之后在请求之间保持存活。
+客户端见 daemon_client，CLI 检测到守护进程运行时自动通过它读取
+"""
+
+import argparse
+import hmac
+import json
+import os
+import secrets
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, Tuple
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smart_url_reader.smart_reader import smart_read_url, available_strategies
+from smart_url_reader.scheduler import get_scheduler, PRIORITIES, PRIORITY_INTERACTIVE
+from smart_url_reader.strategy_stats import get_strategy_stats
+from smart_url_reader.content_cache import get_content_cache
+from smart_url_reader.obsidian_sync import sync_read_result_to_obsidian
+from smart_url_reader.daemon_client import (
+    DEFAULT_DAEMON_HOST,
+    DEFAULT_DAEMON_PORT,
+    DEFAULT_DAEMON_STATE_PATH,
+    read_daemon_state,
+    daemon_status,
+    stop_daemon,
+)
+
+
+# 请求体大小上限（字节）
+MAX_REQUEST_BYTES = 1024 * 1024
+
+# 客户端可传入的 smart_read_url 参数
+READ_OPTIONS: Dict[str, str] = {
+    'strategies': 'str_list',
+    'firecrawl_api_key': 'str',
+    'storage_state': 'str',
+    'hedge': 'bool',
+    'hedge_delay': 'number',
+    'adaptive': 'bool',
+    'circuit_breaker': 'bool',
+    'use_cache': 'bool',
+    'refresh': 'bool',
+    'expand_short_links': 'bool',
+}
+
+_TYPE_NAMES = {
+    'str': '字符串',
+    'str_list': '字符串数组',
+    'bool': '布尔值',
+    'number': '数字',
+}
+
+
+def _check_type(value: Any, kind: str) -> bool:
+    """检查 JSON 值的类型（None 表示使用默认值，始终允许）"""
+    if value is None:
+        return True
+    if kind == 'str':
+        return isinstance(value, str)
+    if kind == 'str_list':
+        return isinstance(value, list) and all(isinstance(v, str) for v in value)
+    if kind == 'bool':
+        return isinstance(value, bool)
+    if kind == 'number':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return False
+
+
+def _parse_read_request(payload: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """校验 /read、/sync 的请求体，返回 (读取参数, 错误信息)"""
+    url = payload.get('url')
+    if not isinstance(url, str) or not url:
+        return None, "url 必须为非空字符串"
+
+    for field in ('priority', 'vault', 'folder'):
+        if not _check_type(payload.get(field), 'str'):
+            return None, f"{field} 必须为字符串"
+
+    options = payload.get('options')
+    if options is None:
+        options = {}
+    if not isinstance(options, dict):
+        return None, "options 必须为 JSON 对象"
+
+    read_options = {}
+    for name, value in options.items():
+        kind = READ_OPTIONS.get(name)
+        if kind is None:
+            continue
+        if not _check_type(value, kind):
+            return None, f"options.{name} 必须为{_TYPE_NAMES[kind]}"
+        read_options[name] = value
+    return read_options, None
+
+
+def _write_state(path: str, state: Dict[str, Any]) -> None:
+    """写入状态文件（仅当前用户可读，原子替换）"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _remove_state(path: str) -> None:
+    """删除状态文件（只删除本进程写入的）"""
+    state = read_daemon_state(path)
+    if state and state.get('pid') == os.getpid():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class _DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], token: str, verbose: bool = False):
+        super().__init__(address, _DaemonHandler)
+        self.token = token
+        self.verbose = verbose
+        self.started_at = time.time()
+        self.requests_served = 0
+        self._counter_lock = threading.Lock()
+
+    def count_request(self) -> None:
+        with self._counter_lock:
+            self.requests_served += 1
+
+
+class _DaemonHandler(BaseHTTPRequestHandler):
+    server: _DaemonServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # 默认写到标准错误，守护进程只在 --verbose 时输出
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any], close: bool = False) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if close:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reject(self, status: int, error: str) -> None:
+        """在读取请求体之前拒绝请求：关闭连接，避免未读的请求体被当作下一个请求"""
+        self._send_json(status, {'error': error}, close=True)
+
+    def _authorized(self) -> bool:
+        header = self.headers.get('Authorization', '')
+        token = header[7:] if header.startswith('Bearer ') else ''
+        return hmac.compare_digest(token, self.server.token)
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        # 要求 application/json，浏览器页面无法在不经 CORS 预检的情况下跨站提交
+        if not self.headers.get('Content-Type', '').startswith('application/json'):
+            self._reject(415, '请求体必须为 application/json')
+            return None
+        try:
+            length = int(self.headers.get('Content-Length', '0'))
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_REQUEST_BYTES:
+            self._reject(413, '请求体过大')
+            return None
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': '请求体不是有效的 JSON'})
+            return None
+        if not isinstance(payload, dict):
+            self._send_json(400, {'error': '请求体必须为 JSON 对象'})
+            return None
+        return payload
+
+    def do_GET(self) -> None:
+        if not self._authorized():
+            self._reject(401, '未授权')
+            return
+        if self.path != '/health':
+            self._reject(404, f"未知路径: {self.path}")
+            return
+
+        self._send_json(200, {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'started_at': self.server.started_at,
+            'requests_served': self.server.requests_served,
+            'strategies': available_strategies(),
+            'scheduler': get_scheduler().stats(),
+        })
+
+    def do_POST(self) -> None:
+        if not self._authorized():
+            self._reject(401, '未授权')
+            return
+
+        if self.path == '/shutdown':
+            self._send_json(200, {'status': 'stopping'})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        if self.path not in ('/read', '/sync'):
+            self._reject(404, f"未知路径: {self.path}")
+            return
+
+        payload = self._read_json()
+        if payload is None:
+            return
+
+        options, error = _parse_read_request(payload)
+        if error:
+            self._send_json(400, {'error': error})
+            return
+        url = payload['url']
+        priority = payload.get('priority') or PRIORITY_INTERACTIVE
+        if priority not in PRIORITIES:
+            self._send_json(400, {'error': f"未知优先级: {priority}"})
+            return
+        self.server.count_request()
+
+        # 经调度器执行：编辑器剪藏（interactive）优先于后台批量任务（bulk）
+        try:
+            future = get_scheduler().submit(smart_read_url, url, priority=priority, **options)
+            result, error = future.result()
+        except Exception as e:
+            self._send_json(500, {'result': None, 'error': f"未知错误: {e}"})
+            return
+
+        if self.path == '/read' or error:
+            self._send_json(200, {'result': result, 'error': error})
+            return
+
+        synced, sync_error = sync_read_result_to_obsidian(
+            result=result,
+            vault_path=payload.get('vault') or os.environ.get('OBSIDIAN_VAULT_PATH'),
+            folder=payload.get('folder') or 'Clippings'
+        )
+        self._send_json(200, {'result': result, 'error': sync_error, 'synced': synced})
+
+
+def _preload() -> None:
+    """预先导入已安装的读取后端并打开内容缓存，避免首个请求承担导入与建库耗时"""
+    # web_reader 的后台事件循环等只在服务端需要，不在模块顶部导入
+    from web_reader import available_backends, load_backend
+
+    for name in available_backends():
+        try:
+            load_backend(name)
+        except ImportError:
+            pass
+    try:
+        get_content_cache()
+    except Exception:
+        # 缓存不可用时读取照常进行（见 smart_read_url）
+        pass
+
+
+def serve(
+    host: str = DEFAULT_DAEMON_HOST,
+    port: int = DEFAULT_DAEMON_PORT,
+    state_path: str = DEFAULT_DAEMON_STATE_PATH,
+    verbose: bool = False
+) -> None:
+    """启动守护进程并阻塞运行，收到 SIGTERM / Ctrl+C 或 /shutdown 请求后退出"""
+    token = secrets.token_urlsafe(32)
+    server = _DaemonServer((host, port), token, verbose)
+    _preload()
+
+    _write_state(state_path, {
+        'host': host,
+        'port': server.server_address[1],
+        'pid': os.getpid(),
+        'token': token,
+    })
+
+    def handle_sigterm(signum, frame):
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    print(f"[Daemon] 监听 http://{host}:{server.server_address[1]}（PID {os.getpid()}）", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        _remove_state(state_path)
+        # 关闭浏览器池与后台事件循环，保存策略统计
+        from web_reader import shutdown_background_loop
+        shutdown_background_loop()
+        get_strategy_stats().save()
+        print("[Daemon] 已退出", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='URL 智能读取器守护进程 - 保持浏览器与连接就绪，加速 CLI 读取'
+    )
+    parser.add_argument('--host', default=DEFAULT_DAEMON_HOST, help=f'监听地址（默认: {DEFAULT_DAEMON_HOST}）')
+    parser.add_argument('--port', '-p', type=int, default=DEFAULT_DAEMON_PORT, help=f'监听端口（默认: {DEFAULT_DAEMON_PORT}，0 表示随机端口）')
+    parser.add_argument('--state-file', default=DEFAULT_DAEMON_STATE_PATH, help='状态文件路径')
+    parser.add_argument('--status', action='store_true', help='查看守护进程状态')
+    parser.add_argument('--stop', action='store_true', help='停止正在运行的守护进程')
+    parser.add_argument('--verbose', '-V', action='store_true', help='打印请求日志')
+
+    args = parser.parse_args()
+
+    if args.status:
+        status = daemon_status(args.state_file)
+        if status is None:
+            print("守护进程未运行")
+            sys.exit(1)
+        print(json.dumps(status, ensure_ascii=False, indent=2))
+        return
+
+    if args.stop:
+        if stop_daemon(args.state_file):
+            print("已通知守护进程退出")
+        else:
+            print("守护进程未运行")
+            sys.exit(1)
+        return
+
+    if daemon_status(args.state_file) is not None:
+        print("守护进程已在运行（使用 --status 查看，--stop 停止）")
+        sys.exit(1)
+
+    try:
+        serve(args.host, args.port, args.state_file, args.verbose)
+    except OSError as e:
+        print(f"启动失败: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
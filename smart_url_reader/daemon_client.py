@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+URL 智能读取器守护进程客户端
+只依赖 http.client 与 json，CLI 可以在不导入服务端（http.server、浏览器池等）的情况下
+发现并调用守护进程
+"""
+
+import http.client
+import json
+import os
+import sys
+from typing import Optional, Dict, Any, Tuple
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from smart_url_reader.scheduler import PRIORITY_INTERACTIVE
+
+
+# 默认监听地址（只监听本机）
+DEFAULT_DAEMON_HOST = '127.0.0.1'
+DEFAULT_DAEMON_PORT = int(os.environ.get('SMART_READER_DAEMON_PORT', '8765'))
+
+# 状态文件：记录端口、进程号与访问令牌，客户端据此发现守护进程
+DEFAULT_DAEMON_STATE_PATH = os.environ.get(
+    'SMART_READER_DAEMON_STATE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'cody_tools', 'daemon.json')
+)
+
+# 客户端等待读取结果的超时（秒），需大于各策略超时之和
+DAEMON_CLIENT_TIMEOUT = 300
+
+
+class DaemonError(Exception):
+    """请求已发送给守护进程，但未能取得结果（如等待超时）"""
+
+
+class DaemonUnavailable(DaemonError):
+    """守护进程未运行或无法连接（请求未送达，调用方可改为本地读取）"""
+
+
+def read_daemon_state(path: str = DEFAULT_DAEMON_STATE_PATH) -> Optional[Dict[str, Any]]:
+    """读取状态文件，不存在或已损坏时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or not state.get('port') or not state.get('token'):
+        return None
+    return state
+
+
+def _request(
+    method: str,
+    path: str,
+    payload: Optional[Dict[str, Any]] = None,
+    timeout: float = DAEMON_CLIENT_TIMEOUT,
+    state_path: str = DEFAULT_DAEMON_STATE_PATH
+) -> Dict[str, Any]:
+    """
+    向守护进程发送请求
+
+    Raises:
+        DaemonUnavailable: 未运行、无法连接或请求未送达
+        DaemonError: 请求已送达，但等待或读取响应失败
+    """
+    state = read_daemon_state(state_path)
+    if state is None:
+        raise DaemonUnavailable("守护进程未运行")
+
+    headers = {'Authorization': f"Bearer {state['token']}"}
+    body = None
+    if payload is not None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+
+    conn = http.client.HTTPConnection(state.get('host', DEFAULT_DAEMON_HOST), state['port'], timeout=timeout)
+    try:
+        # 守护进程读完整个请求体后才开始处理，发送失败说明请求未被执行
+        try:
+            conn.request(method, path, body=body, headers=headers)
+        except OSError as e:
+            raise DaemonUnavailable(f"无法连接守护进程: {e}")
+        # 请求已送达：此后的超时或断开不能回退到本地读取，否则同一 URL 会被读取两次
+        try:
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            raise DaemonError(f"等待守护进程响应失败: {e}")
+    finally:
+        conn.close()
+
+    if response.status == 401:
+        raise DaemonUnavailable("守护进程令牌不匹配")
+    try:
+        reply = json.loads(data)
+    except ValueError:
+        raise DaemonUnavailable(f"守护进程返回了无效的响应（HTTP {response.status}）")
+    return reply
+
+
+def daemon_status(state_path: str = DEFAULT_DAEMON_STATE_PATH) -> Optional[Dict[str, Any]]:
+    """返回守护进程状态，未运行或无响应时返回 None"""
+    try:
+        return _request('GET', '/health', timeout=2, state_path=state_path)
+    except DaemonError:
+        return None
+
+
+def read_via_daemon(
+    url: str,
+    state_path: str = DEFAULT_DAEMON_STATE_PATH,
+    priority: str = PRIORITY_INTERACTIVE,
+    **options: Any
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    通过守护进程读取 URL，返回值与 smart_read_url 相同
+
+    Args:
+        priority: 调度优先级，后台批量任务应使用 'bulk'
+
+    Raises:
+        DaemonUnavailable: 守护进程未运行或无法连接（调用方应改为本地读取）；
+            请求送达后的超时等错误作为读取错误返回，不抛出
+    """
+    payload = {'url': url, 'options': options, 'priority': priority}
+    try:
+        reply = _request('POST', '/read', payload, state_path=state_path)
+    except DaemonUnavailable:
+        raise
+    except DaemonError as e:
+        return None, str(e)
+    return reply.get('result'), reply.get('error')
+
+
+def stop_daemon(state_path: str = DEFAULT_DAEMON_STATE_PATH) -> bool:
+    """请求守护进程退出，返回是否已发送"""
+    try:
+        _request('POST', '/shutdown', timeout=5, state_path=state_path)
+        return True
+    except DaemonUnavailable:
+        return False
+    except DaemonError:
+        # 请求已送达，只是未及时收到确认
+        return True
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+优先级调度器
+交互式读取（CLI 剪藏）与后台批量任务共用一组工作线程：
+交互式任务优先并保留部分线程，批量任务等待过久时提升优先级，避免饿死
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Callable, Deque, Tuple
+
+
+# 任务优先级
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BULK = 'bulk'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+# 默认工作线程数
+SCHEDULER_MAX_WORKERS = 16
+
+# 为交互式任务保留的线程数（批量任务最多占用 max_workers - 该值）
+RESERVED_INTERACTIVE_WORKERS = 4
+
+# 批量任务排队超过该时间（秒）后优先于交互式任务执行
+BULK_AGING_SECONDS = 30.0
+
+_Job = Tuple[float, Future, Callable[..., Any], tuple, Dict[str, Any]]
+
+
+class PriorityScheduler:
+    """
+    两级优先级的线程池（线程安全）
+
+    - 有交互式任务排队时优先执行交互式任务
+    - 批量任务最多同时占用 max_workers - reserved_interactive 个线程，
+      保证交互式任务随时有空闲线程可用
+    - 排队最久的批量任务等待超过 aging 秒后先于交互式任务执行（仍受上述占用上限约束）
+    """
+
+    def __init__(
+        self,
+        max_workers: int = SCHEDULER_MAX_WORKERS,
+        reserved_interactive: int = RESERVED_INTERACTIVE_WORKERS,
+        aging: float = BULK_AGING_SECONDS
+    ):
+        self.max_workers = max(1, max_workers)
+        # 至少给批量任务留一个线程
+        self.reserved_interactive = min(max(0, reserved_interactive), self.max_workers - 1)
+        self.aging = aging
+        self._queues: Dict[str, Deque[_Job]] = {p: deque() for p in PRIORITIES}
+        self._running: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._cond = threading.Condition()
+        self._threads = []
+        self._shutdown = False
+
+    @property
+    def bulk_capacity(self) -> int:
+        """批量任务可同时占用的线程数"""
+        return self.max_workers - self.reserved_interactive
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: str = PRIORITY_BULK,
+        **kwargs: Any
+    ) -> Future:
+        """
+        提交任务
+
+        Args:
+            fn: 要执行的函数
+            priority: PRIORITY_INTERACTIVE 或 PRIORITY_BULK
+
+        Returns:
+            concurrent.futures.Future；排队中的任务可以 cancel()
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"未知优先级: {priority}")
+
+        future: Future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("调度器已关闭")
+            self._queues[priority].append((time.monotonic(), future, fn, args, kwargs))
+            self._start_workers()
+            self._cond.notify()
+        return future
+
+    def _start_workers(self) -> None:
+        """首次提交时启动全部工作线程（需持有锁）"""
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f"smart-reader-scheduler-{len(self._threads)}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self) -> Optional[Tuple[str, _Job]]:
+        """按优先级选出下一个任务（需持有锁）"""
+        interactive = self._queues[PRIORITY_INTERACTIVE]
+        bulk = self._queues[PRIORITY_BULK]
+        bulk_allowed = bool(bulk) and self._running[PRIORITY_BULK] < self.bulk_capacity
+
+        if bulk_allowed and interactive and time.monotonic() - bulk[0][0] >= self.aging:
+            return PRIORITY_BULK, bulk.popleft()
+        if interactive:
+            return PRIORITY_INTERACTIVE, interactive.popleft()
+        if bulk_allowed:
+            return PRIORITY_BULK, bulk.popleft()
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    picked = self._next_job()
+                    if picked is not None:
+                        break
+                    if self._shutdown and not any(self._queues.values()):
+                        return
+                    self._cond.wait()
+                priority, (_, future, fn, args, kwargs) = picked
+                self._running[priority] += 1
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running[priority] -= 1
+                    # 批量任务的占用上限可能因此解除，唤醒所有等待的线程
+                    self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """各优先级的排队数与运行数"""
+        with self._cond:
+            return {
+                priority: {
+                    'queued': len(self._queues[priority]),
+                    'running': self._running[priority],
+                }
+                for priority in PRIORITIES
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """不再接受新任务；已排队的任务执行完后线程退出"""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+_default_scheduler: Optional[PriorityScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> PriorityScheduler:
+    """获取进程内共享的默认调度器"""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = PriorityScheduler()
+        return _default_scheduler
@@ -5,20 +5,27 @@ URL 智能读取器
 """
 
 import os
+import sqlite3
 import sys
-from typing import Optional, Tuple, Dict, Any, Callable
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Tuple, Dict, Any, Callable, List, Iterable, Iterator
 from urllib.parse import urlparse
 
 # 添加上级目录到路径，以便导入其他模块
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from url_utils import identify_platform
-from web_reader import (
-    read_with_jina,
-    read_with_firecrawl,
-    read_with_playwright,
-    read_webpage_with_meta as jina_with_meta
-)
+from smart_url_reader.strategy_stats import StrategyStats, get_strategy_stats
+from smart_url_reader.circuit_breaker import CircuitBreaker, get_circuit_breaker
+from smart_url_reader.content_cache import ContentCache, get_content_cache
+from smart_url_reader.concurrency import ConcurrencyLimiter
+from smart_url_reader.scheduler import PriorityScheduler, get_scheduler, PRIORITY_BULK
+# 各后端在首次使用时才导入（见 web_reader.__getattr__），
+# 未安装 playwright / firecrawl 时其余策略照常可用
+import web_reader
+from web_reader import is_backend_available, missing_backend_message
 
 
 # 策略优先级配置
@@ -35,13 +42,58 @@ PLATFORM_STRATEGY_MAP = {
     'B站': ['jina', 'firecrawl'],
 }
 
+# 对冲模式：首个策略超过该时间（秒）仍未返回时并行启动下一个策略
+PLATFORM_HEDGE_DELAY = {
+    '微信公众号': 4.0,
+    '小红书': 3.0,
+    '知乎': 3.0,
+    '抖音': 5.0,
+    '淘宝': 8.0,
+    '京东': 3.0,
+    'B站': 3.0,
+}
+DEFAULT_HEDGE_DELAY = 5.0
+
+# 对冲模式使用的工作线程数量上限
+HEDGE_MAX_WORKERS = 16
+
+# 批量读取：每个主机同时进行的读取数（未列出的主机取 DEFAULT_HOST_CONCURRENCY）
+HOST_CONCURRENCY = {
+    'mp.weixin.qq.com': 2,
+    'www.zhihu.com': 2,
+    'zhuanlan.zhihu.com': 2,
+    'www.xiaohongshu.com': 2,
+}
+DEFAULT_HOST_CONCURRENCY = 4
+
+# 批量读取：每个策略同时进行的请求数（playwright 受浏览器池容量限制）
+STRATEGY_CONCURRENCY = {
+    'jina': 8,
+    'firecrawl': 4,
+    'playwright': 4,
+}
+
+# 批量读取：向后查看多少个待处理 URL，以跳过已达主机上限的 URL
+BATCH_LOOKAHEAD = 64
+
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
 
 def smart_read_url(
     url: str,
     strategies: Optional[list] = None,
     firecrawl_api_key: Optional[str] = None,
     storage_state: Optional[str] = None,
-    verbose: bool = False
+    verbose: bool = False,
+    hedge: bool = False,
+    hedge_delay: Optional[float] = None,
+    adaptive: bool = True,
+    circuit_breaker: bool = True,
+    use_cache: bool = True,
+    refresh: bool = False,
+    expand_short_links: bool = True,
+    strategy_limiter: Optional[ConcurrencyLimiter] = None
 ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
     智能读取 URL 内容
@@ -54,6 +106,16 @@ def smart_read_url(
         firecrawl_api_key: Firecrawl API Key，默认从环境变量读取
         storage_state: Playwright 登录态文件路径
         verbose: 是否打印详细日志
+        hedge: 是否使用对冲模式（前一个策略迟迟未返回时并行启动下一个）
+        hedge_delay: 对冲延迟（秒），默认按平台取 PLATFORM_HEDGE_DELAY
+        adaptive: 是否记录各策略的成功率与耗时，并据此调整默认策略顺序
+                  （显式传入 strategies 时不调整顺序，但仍会记录）
+        circuit_breaker: 是否启用熔断：同一 (策略, 主机名) 连续失败后暂时跳过该策略
+        use_cache: 是否使用本地内容缓存（命中时结果带 cached=True）
+        refresh: 忽略已有缓存强制重新抓取，并用新结果更新缓存
+        expand_short_links: 是否先把 xhslink.com、b23.tv 等短链接解析为真实地址
+                            （结果带 short_url 字段；解析失败时按原 URL 读取）
+        strategy_limiter: 按策略名限制并发的限制器（批量读取时由 smart_read_urls 传入）
 
     Returns:
         Tuple[结果字典, 错误信息]
@@ -63,12 +125,50 @@ def smart_read_url(
     if not url or not isinstance(url, str):
         return None, "URL 不能为空"
 
+    # 解析短链接，后续的平台识别、缓存与抓取都使用真实地址
+    short_url = None
+    if expand_short_links:
+        # 解析器依赖 http.client / ssl，用到时才导入
+        from url_utils.short_link_resolver import is_short_link, resolve_short_link
+    if expand_short_links and is_short_link(url):
+        # 与 Jina 读取共用连接池（连接复用与代理配置一致）
+        resolved, resolve_error = resolve_short_link(url, pool=web_reader.get_http_pool())
+        if resolved:
+            if verbose:
+                print(f"[SmartReader] 短链接解析: {url} -> {resolved}")
+            short_url, url = url, resolved
+        elif verbose:
+            print(f"[SmartReader] 短链接解析失败，按原 URL 读取: {resolve_error}")
+
     # 识别平台
     platform, requires_login = identify_platform(url)
 
     if verbose:
         print(f"[SmartReader] 识别平台: {platform or '未知'}, 需要登录: {requires_login}")
 
+    # 查询本地缓存（缓存不可用时视为未命中，照常读取）
+    cache = _open_cache(verbose) if use_cache else None
+    if cache is not None and not refresh:
+        try:
+            cached = cache.get(url)
+        except (OSError, sqlite3.Error) as e:
+            if verbose:
+                print(f"[SmartReader] 读取缓存失败: {e}")
+            cached = None
+        if cached is not None:
+            if verbose:
+                print(f"[SmartReader] 命中缓存（策略: {cached.get('strategy')}）")
+            # 与本次请求相关的字段以本次为准
+            cached['platform'] = platform
+            cached['requires_login'] = requires_login
+            if short_url:
+                cached['short_url'] = short_url
+            else:
+                cached.pop('short_url', None)
+            return cached, None
+
+    stats = get_strategy_stats() if adaptive else None
+
     # 确定策略列表
     if strategies is None:
         if platform and platform in PLATFORM_STRATEGY_MAP:
@@ -76,6 +176,15 @@ def smart_read_url(
         else:
             strategies = STRATEGY_ORDER.copy()
 
+        # 跳过依赖未安装的策略（全部不可用时保留原列表，以便返回安装提示）
+        installed = [s for s in strategies if is_backend_available(s)]
+        if installed:
+            strategies = installed
+
+        # 按历史成功率与耗时调整顺序
+        if stats is not None:
+            strategies = stats.order(platform, strategies)
+
     # 如果平台需要登录，优先使用 Playwright
     if requires_login and 'playwright' not in strategies:
         strategies = ['playwright'] + strategies
@@ -83,18 +192,164 @@ def smart_read_url(
     if verbose:
         print(f"[SmartReader] 使用策略: {strategies}")
 
-    # 按优先级尝试各策略
+    strategy_kwargs = {
+        'firecrawl_api_key': firecrawl_api_key,
+        'storage_state': storage_state,
+        'platform': platform,
+        'stats': stats,
+        'breaker': get_circuit_breaker() if circuit_breaker else None,
+        'limiter': strategy_limiter,
+    }
+
+    if hedge:
+        delay = hedge_delay
+        if delay is None:
+            delay = PLATFORM_HEDGE_DELAY.get(platform, DEFAULT_HEDGE_DELAY)
+        result, strategy, last_error = _read_hedged(url, strategies, delay, verbose, strategy_kwargs)
+    else:
+        result, strategy, last_error = _read_sequential(url, strategies, verbose, strategy_kwargs)
+
+    if result is None:
+        # 所有策略都失败
+        return None, f"所有策略均失败: {last_error}"
+
+    # 成功
+    result['platform'] = platform
+    result['strategy'] = strategy
+    result['requires_login'] = requires_login
+    if short_url:
+        result['short_url'] = short_url
+
+    if cache is not None:
+        try:
+            cache.put(url, result)
+        except Exception as e:
+            if verbose:
+                print(f"[SmartReader] 写入缓存失败: {e}")
+
+    return result, None
+
+
+def _open_cache(verbose: bool = False) -> Optional[ContentCache]:
+    """获取默认缓存；缓存文件无法创建或打开时返回 None（不使用缓存）"""
+    try:
+        return get_content_cache()
+    except (OSError, sqlite3.Error) as e:
+        if verbose:
+            print(f"[SmartReader] 缓存不可用: {e}")
+        return None
+
+
+def smart_read_urls(
+    urls: Iterable[str],
+    concurrency: int = 8,
+    per_host: Optional[int] = None,
+    per_strategy: Optional[Dict[str, int]] = None,
+    priority: str = PRIORITY_BULK,
+    scheduler: Optional[PriorityScheduler] = None,
+    **options: Any
+) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    批量并发读取 URL
+
+    通过优先级调度器并发执行 smart_read_url，结果按完成顺序逐个产出；
+    单个 URL 失败只体现在它的错误信息中，不影响其他 URL。
+    默认以批量优先级提交，同一进程中的交互式读取（如守护进程收到的剪藏请求）不会被批量任务堵住。
+
+    并发限制：
+    - 全局：本批次最多 concurrency 个 URL 同时读取（调度器的线程数为整个进程的上限）
+    - 主机：同一主机最多 per_host 个（默认按 HOST_CONCURRENCY / DEFAULT_HOST_CONCURRENCY），
+      已达上限的主机的 URL 暂缓，先处理其他主机
+    - 策略：同一策略最多 per_strategy[策略] 个请求（默认 STRATEGY_CONCURRENCY）
+
+    Args:
+        urls: URL 可迭代对象（惰性读取，可以是生成器）
+        concurrency: 全局并发数
+        per_host: 每个主机的并发数，指定后覆盖 HOST_CONCURRENCY
+        per_strategy: 每个策略的并发数，与 STRATEGY_CONCURRENCY 合并
+        priority: 调度优先级，PRIORITY_BULK（默认）或 PRIORITY_INTERACTIVE
+        scheduler: 使用的调度器，默认为进程内共享的 get_scheduler()
+        **options: 传给 smart_read_url 的其他参数（hedge、use_cache 等）
+
+    Yields:
+        Tuple[URL, 结果字典, 错误信息]
+    """
+    if per_host is None:
+        host_limiter = ConcurrencyLimiter(HOST_CONCURRENCY, DEFAULT_HOST_CONCURRENCY)
+    else:
+        host_limiter = ConcurrencyLimiter(default=per_host)
+    options['strategy_limiter'] = ConcurrencyLimiter({**STRATEGY_CONCURRENCY, **(per_strategy or {})})
+
+    concurrency = max(1, concurrency)
+    lookahead = max(BATCH_LOOKAHEAD, concurrency)
+    if scheduler is None:
+        scheduler = get_scheduler()
+    source = iter(urls)
+    exhausted = False
+    waiting: List[str] = []
+    running: Dict[Any, Tuple[str, str]] = {}
+
+    try:
+        while True:
+            while not exhausted and len(waiting) < lookahead:
+                try:
+                    waiting.append(next(source))
+                except StopIteration:
+                    exhausted = True
+
+            # 按顺序提交，跳过主机已达上限的 URL
+            index = 0
+            while len(running) < concurrency and index < len(waiting):
+                url = waiting[index]
+                host = _host_key(url)
+                if not host_limiter.try_acquire(host):
+                    index += 1
+                    continue
+                del waiting[index]
+                future = scheduler.submit(smart_read_url, url, priority=priority, **options)
+                running[future] = (url, host)
+
+            if not running:
+                # 没有运行中的任务时所有主机都有空位，waiting 必然已提交完
+                break
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                url, host = running.pop(future)
+                host_limiter.release(host)
+                try:
+                    result, error = future.result()
+                except Exception as e:
+                    result, error = None, f"未知错误: {e}"
+                yield url, result, error
+    finally:
+        # 调用方提前结束迭代时，取消尚未开始的任务
+        for future in running:
+            if future.cancel():
+                host_limiter.release(running[future][1])
+
+
+def _host_key(url: Any) -> str:
+    try:
+        return (urlparse(url).hostname or '') if isinstance(url, str) else ''
+    except ValueError:
+        return ''
+
+
+def _read_sequential(
+    url: str,
+    strategies: List[str],
+    verbose: bool,
+    strategy_kwargs: Dict[str, Any]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+    """按优先级依次尝试各策略，返回 (结果, 成功的策略, 最后的错误)"""
     last_error = None
 
     for strategy in strategies:
         if verbose:
             print(f"[SmartReader] 尝试策略: {strategy}")
 
-        result, error = _try_strategy(
-            url, strategy,
-            firecrawl_api_key=firecrawl_api_key,
-            storage_state=storage_state
-        )
+        result, error = _run_strategy(url, strategy, **strategy_kwargs)
 
         if error:
             last_error = f"{strategy}: {error}"
@@ -102,30 +357,162 @@ def smart_read_url(
                 print(f"[SmartReader] {strategy} 失败: {error}")
             continue
 
-        # 成功
-        result['platform'] = platform
-        result['strategy'] = strategy
-        result['requires_login'] = requires_login
-
         if verbose:
             print(f"[SmartReader] {strategy} 成功!")
 
-        return result, None
+        return result, strategy, None
 
-    # 所有策略都失败
-    return None, f"所有策略均失败: {last_error}"
+    return None, None, last_error
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=HEDGE_MAX_WORKERS,
+                thread_name_prefix='smart-reader-hedge'
+            )
+        return _hedge_executor
+
+
+def _read_hedged(
+    url: str,
+    strategies: List[str],
+    delay: float,
+    verbose: bool,
+    strategy_kwargs: Dict[str, Any]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[str]]:
+    """
+    对冲执行各策略，返回 (结果, 成功的策略, 最后的错误)
+
+    先启动第一个策略；若 delay 秒内未返回，或已返回失败，则并行启动下一个策略。
+    返回第一个通过校验的结果，其余策略的结果被丢弃（已在运行的请求无法中断，
+    会在各自超时后自然结束）。
+    """
+    executor = _get_hedge_executor()
+    pending: Dict[Any, str] = {}
+    next_index = 0
+    last_error = None
+
+    def launch_next():
+        nonlocal next_index
+        strategy = strategies[next_index]
+        next_index += 1
+        if verbose:
+            print(f"[SmartReader] 启动策略: {strategy}")
+        future = executor.submit(_run_strategy, url, strategy, **strategy_kwargs)
+        pending[future] = strategy
+
+    try:
+        while pending or next_index < len(strategies):
+            if not pending:
+                launch_next()
+
+            has_more = next_index < len(strategies)
+            done, _ = wait(
+                list(pending),
+                timeout=delay if has_more else None,
+                return_when=FIRST_COMPLETED
+            )
+
+            if not done:
+                # 超过对冲延迟仍未返回，并行启动下一个策略
+                if verbose:
+                    print(f"[SmartReader] {delay} 秒内未返回，对冲启动下一个策略")
+                launch_next()
+                continue
+
+            for future in done:
+                strategy = pending.pop(future)
+                try:
+                    result, error = future.result()
+                except Exception as e:
+                    result, error = None, f"未知错误: {e}"
+
+                if error:
+                    last_error = f"{strategy}: {error}"
+                    if verbose:
+                        print(f"[SmartReader] {strategy} 失败: {error}")
+                    # 失败后立即启动下一个策略，不再等待对冲延迟
+                    if next_index < len(strategies):
+                        launch_next()
+                    continue
+
+                if verbose:
+                    print(f"[SmartReader] {strategy} 成功!")
+                return result, strategy, None
+    finally:
+        # 取消尚未开始的策略
+        for future in pending:
+            future.cancel()
+
+    return None, None, last_error
+
+
+def available_strategies() -> List[str]:
+    """返回依赖已安装、可以使用的策略（按 STRATEGY_ORDER 顺序）"""
+    return [strategy for strategy in STRATEGY_ORDER if is_backend_available(strategy)]
+
+
+def _run_strategy(
+    url: str,
+    strategy: str,
+    stats: Optional[StrategyStats] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    limiter: Optional[ConcurrencyLimiter] = None,
+    **kwargs: Any
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """执行策略：检查熔断状态与策略并发上限，并记录成功率与耗时"""
+    # 依赖未安装不算策略失败，不计入统计与熔断
+    if strategy in STRATEGY_ORDER and not is_backend_available(strategy):
+        return None, missing_backend_message(strategy)
+
+    host = _host_key(url) or None
+
+    if breaker is not None:
+        allowed, remaining = breaker.allow(strategy, host)
+        if not allowed:
+            return None, f"已熔断，跳过（约 {remaining:.0f} 秒后重试）"
+
+    if limiter is not None:
+        limiter.acquire(strategy)
+    try:
+        # 耗时不含等待并发空位的时间
+        started = time.monotonic()
+        result, error = _try_strategy(url, strategy, **kwargs)
+    finally:
+        if limiter is not None:
+            limiter.release(strategy)
+
+    # 本地限流拒绝时请求并未发出，不计入统计与熔断
+    if web_reader.is_rate_limited_error(error):
+        if breaker is not None:
+            breaker.release(strategy, host)
+        return result, error
+
+    if stats is not None:
+        stats.record(kwargs.get('platform'), strategy, error is None, time.monotonic() - started)
+    if breaker is not None:
+        if error is None:
+            breaker.record_success(strategy, host)
+        else:
+            breaker.record_failure(strategy, host)
+
+    return result, error
 
 
 def _try_strategy(
     url: str,
     strategy: str,
     firecrawl_api_key: Optional[str] = None,
-    storage_state: Optional[str] = None
+    storage_state: Optional[str] = None,
+    platform: Optional[str] = None
 ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """尝试使用指定策略读取 URL"""
 
     if strategy == 'jina':
-        content, error = read_with_jina(url)
+        content, error = web_reader.read_with_jina(url)
         if error:
             return None, error
         return {
@@ -142,7 +529,7 @@ def _try_strategy(
         if not firecrawl_api_key:
             return None, "未设置 FIRECRAWL_API_KEY"
 
-        result, error = read_with_firecrawl(url, api_key=firecrawl_api_key)
+        result, error = web_reader.read_with_firecrawl(url, api_key=firecrawl_api_key)
         if error:
             return None, error
 
@@ -155,7 +542,13 @@ def _try_strategy(
         }, None
 
     elif strategy == 'playwright':
-        result, error = read_with_playwright(url, storage_state=storage_state)
+        # 按平台预设拦截图片、字体和统计请求，并等待平台正文节点就绪
+        result, error = web_reader.read_with_playwright(
+            url,
+            storage_state=storage_state,
+            block_resources=platform or True,
+            content_selector=web_reader.PLATFORM_CONTENT_SELECTORS.get(platform)
+        )
         if error:
             return None, error
 
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+策略统计
+按 (平台, 策略) 记录成功率与耗时并持久化到本地 JSON，
+供 smart_read_url 自动调整策略顺序
+"""
+
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+
+# 默认统计文件路径，可通过 SMART_READER_STATS_PATH 环境变量修改
+DEFAULT_STATS_PATH = os.environ.get(
+    'SMART_READER_STATS_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'cody_tools', 'strategy_stats.json')
+)
+
+# 指数滑动平均的权重（越大越看重最近的结果）
+EMA_ALPHA = 0.2
+
+# 样本数少于该值时使用先验值，避免一两次结果就改变顺序
+MIN_SAMPLES = 3
+
+# 先验成功率（样本不足时）
+PRIOR_SUCCESS_RATE = 0.5
+
+# 耗时换算尺度（秒）：得分 = 成功率 / (1 + 耗时 / LATENCY_SCALE)
+LATENCY_SCALE = 10.0
+
+# 探索概率：以该概率把排在后面的策略提到最前，使恢复的策略有机会被重新尝试
+EXPLORATION_RATE = 0.05
+
+# 两次写盘之间的最短间隔（秒）
+SAVE_INTERVAL = 5.0
+
+
+class StrategyStats:
+    """
+    (平台, 策略) 维度的成功率与耗时统计
+
+    数据结构: {platform: {strategy: {attempts, success_rate, latency}}}
+    success_rate / latency 为指数滑动平均，latency 只统计成功的请求。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_STATS_PATH,
+        exploration_rate: float = EXPLORATION_RATE
+    ):
+        self.path = path
+        self.exploration_rate = exploration_rate
+        self._data: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._data = data
+        except (OSError, ValueError):
+            # 文件损坏时从头统计
+            self._data = {}
+
+    def save(self) -> None:
+        """写入统计文件（原子替换）"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self._data, ensure_ascii=False, indent=2)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def record(
+        self,
+        platform: Optional[str],
+        strategy: str,
+        success: bool,
+        latency: float
+    ) -> None:
+        """记录一次策略执行结果"""
+        key = platform or '未知'
+        with self._lock:
+            entry = self._data.setdefault(key, {}).setdefault(strategy, {
+                'attempts': 0,
+                'success_rate': PRIOR_SUCCESS_RATE,
+                'latency': None,
+            })
+            entry['attempts'] += 1
+            entry['success_rate'] += EMA_ALPHA * ((1.0 if success else 0.0) - entry['success_rate'])
+            if success:
+                if entry['latency'] is None:
+                    entry['latency'] = latency
+                else:
+                    entry['latency'] += EMA_ALPHA * (latency - entry['latency'])
+            self._dirty = True
+            should_save = time.monotonic() - self._last_save >= SAVE_INTERVAL
+
+        if should_save:
+            self.save()
+
+    def score(self, platform: Optional[str], strategy: str) -> float:
+        """策略得分，越高越优先"""
+        with self._lock:
+            entry = self._data.get(platform or '未知', {}).get(strategy)
+            if not entry or entry['attempts'] < MIN_SAMPLES:
+                return PRIOR_SUCCESS_RATE
+            latency = entry['latency'] if entry['latency'] is not None else LATENCY_SCALE
+            return entry['success_rate'] / (1.0 + latency / LATENCY_SCALE)
+
+    def order(self, platform: Optional[str], strategies: List[str]) -> List[str]:
+        """
+        按得分重新排序策略
+
+        得分相同时保持原有顺序；以 exploration_rate 的概率把一个排在后面的
+        策略提到最前。
+        """
+        ranked = sorted(
+            strategies,
+            key=lambda s: (-self.score(platform, s), strategies.index(s))
+        )
+        if len(ranked) > 1 and random.random() < self.exploration_rate:
+            explored = ranked.pop(random.randrange(1, len(ranked)))
+            ranked.insert(0, explored)
+        return ranked
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回当前统计数据的副本"""
+        with self._lock:
+            return json.loads(json.dumps(self._data))
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._data = {}
+            self._dirty = True
+        self.save()
+
+
+_default_stats: Optional[StrategyStats] = None
+_default_stats_lock = threading.Lock()
+
+
+def get_strategy_stats() -> StrategyStats:
+    """获取进程内共享的默认统计（首次调用时从文件加载）"""
+    global _default_stats
+    with _default_stats_lock:
+        if _default_stats is None:
+            _default_stats = StrategyStats()
+            atexit.register(_default_stats.save)
+        return _default_stats
@@ -1,3 +1,56 @@
-from .platform_identifier import identify_platform, identify_platform_with_info, PLATFORM_MAP
+"""
+URL 工具
 
-__all__ = ['identify_platform', 'identify_platform_with_info', 'PLATFORM_MAP']
+短链接解析（依赖网络模块）与 URL 分类命令行工具在首次访问对应名称时才导入。
+"""
+
+import importlib
+
+from .platform_identifier import (
+    identify_platform, identify_platform_with_info, identify_platforms, identify_hostname,
+    rebuild_platform_index, PLATFORM_MAP
+)
+from .url_canonicalizer import (
+    canonicalize_url, DedupIndex, CANONICAL_RULES, TRACKING_PARAMS, PLATFORM_TRACKING_PARAMS
+)
+
+# 导出名称 -> (模块, 模块内名称)，首次访问时导入
+_LAZY_EXPORTS = {
+    # 短链接解析
+    'ShortLinkResolver': ('short_link_resolver', 'ShortLinkResolver'),
+    'is_short_link': ('short_link_resolver', 'is_short_link'),
+    'resolve_short_link': ('short_link_resolver', 'resolve_short_link'),
+    'resolve_short_links': ('short_link_resolver', 'resolve_short_links'),
+    'get_short_link_resolver': ('short_link_resolver', 'get_short_link_resolver'),
+    'SHORT_LINK_HOSTS': ('short_link_resolver', 'SHORT_LINK_HOSTS'),
+    # URL 分类
+    'classify_urls': ('url_classifier', 'classify_urls'),
+    'count_platforms': ('url_classifier', 'count_platforms'),
+    'iter_urls_from_file': ('url_classifier', 'iter_urls_from_file'),
+    'iter_urls_from_history': ('url_classifier', 'iter_urls_from_history'),
+    'iter_urls_from_lines': ('url_classifier', 'iter_urls_from_lines'),
+}
+
+
+def __getattr__(name):
+    try:
+        module_name, attr = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{module_name}", __name__), attr)
+    # 缓存到模块字典，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
+
+__all__ = [
+    'identify_platform', 'identify_platform_with_info', 'identify_platforms', 'identify_hostname',
+    'rebuild_platform_index', 'PLATFORM_MAP',
+    'canonicalize_url', 'DedupIndex', 'CANONICAL_RULES', 'TRACKING_PARAMS',
+    'PLATFORM_TRACKING_PARAMS',
+    *_LAZY_EXPORTS,
+]
@@ -4,8 +4,9 @@ URL 平台识别工具
 用于识别 URL 所属的平台及其访问限制
 """
 
-from urllib.parse import urlparse
-from typing import Tuple, Optional
+from functools import lru_cache
+from urllib.parse import urlsplit
+from typing import Tuple, Optional, Iterable, Iterator, Dict, Any
 
 
 # 平台配置：域名 -> (平台名称, 是否需要登录)
@@ -46,42 +47,102 @@ PLATFORM_MAP = {
 }
 
 
+# 主机名匹配结果的缓存条数
+HOSTNAME_CACHE_SIZE = 65536
+
+# 字典树中保存匹配结果的键（域名标签不会为空字符串）
+_VALUE = ''
+
+PlatformInfo = Tuple[Optional[str], bool]
+
+
+def _build_trie(platform_map: Dict[str, PlatformInfo]) -> Dict[str, Any]:
+    """按域名标签倒序构建后缀字典树：'item.jd.com' -> com -> jd -> item"""
+    root: Dict[str, Any] = {}
+    for domain, info in platform_map.items():
+        node = root
+        for label in reversed(domain.lower().strip('.').split('.')):
+            node = node.setdefault(label, {})
+        node[_VALUE] = info
+    return root
+
+
+_platform_trie = _build_trie(PLATFORM_MAP)
+
+
+@lru_cache(maxsize=HOSTNAME_CACHE_SIZE)
+def _match_hostname(hostname: str) -> PlatformInfo:
+    """最长后缀匹配：zhuanlan.zhihu.com、v.douyin.com 等子域名归入所属平台"""
+    node = _platform_trie
+    matched: PlatformInfo = (None, False)
+    for label in reversed(hostname.rstrip('.').split('.')):
+        node = node.get(label)
+        if node is None:
+            break
+        matched = node.get(_VALUE, matched)
+    return matched
+
+
+def rebuild_platform_index() -> None:
+    """修改 PLATFORM_MAP 后调用，重新构建匹配索引"""
+    global _platform_trie
+    _platform_trie = _build_trie(PLATFORM_MAP)
+    _match_hostname.cache_clear()
+
+
+def _hostname_of(url: str) -> Optional[str]:
+    try:
+        return urlsplit(url).hostname
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def identify_hostname(hostname: Optional[str]) -> PlatformInfo:
+    """
+    按主机名识别平台
+
+    Args:
+        hostname: 主机名（不含协议与端口）
+
+    Returns:
+        Tuple[平台名称, 是否需要登录]
+    """
+    if not hostname:
+        return None, False
+    return _match_hostname(hostname.lower())
+
+
 def identify_platform(url: str) -> Tuple[Optional[str], bool]:
     """
     识别 URL 所属平台
-    
+
+    主机名按域名后缀匹配 PLATFORM_MAP，子域名（zhuanlan.zhihu.com、m.douyin.com 等）
+    归入所属平台；有多个后缀匹配时取最长的一个。
+
     Args:
         url: 输入的 URL 字符串
-        
+
     Returns:
         Tuple[平台名称, 是否需要登录]
         - 平台名称: 识别到的平台名称，未识别则返回 None
         - 是否需要登录: True/False
     """
-    try:
-        parsed = urlparse(url)
-        hostname = parsed.hostname
-        
-        if not hostname:
-            return None, False
-        
-        # 去除 www. 前缀进行匹配（保留原始匹配作为备选）
-        hostname_lower = hostname.lower()
-        
-        # 直接匹配
-        if hostname_lower in PLATFORM_MAP:
-            return PLATFORM_MAP[hostname_lower]
-        
-        # 尝试去除 www. 前缀
-        if hostname_lower.startswith('www.'):
-            hostname_no_www = hostname_lower[4:]
-            if hostname_no_www in PLATFORM_MAP:
-                return PLATFORM_MAP[hostname_no_www]
-        
-        return None, False
-        
-    except Exception:
-        return None, False
+    return identify_hostname(_hostname_of(url))
+
+
+def identify_platforms(urls: Iterable[str]) -> Iterator[Tuple[str, Optional[str], bool]]:
+    """
+    批量识别平台（惰性迭代，每个 URL 只解析一次）
+
+    Args:
+        urls: URL 可迭代对象
+
+    Yields:
+        Tuple[URL, 平台名称, 是否需要登录]，顺序与输入一致
+    """
+    for url in urls:
+        platform, requires_login = identify_hostname(_hostname_of(url))
+        yield url, platform, requires_login
 
 
 def identify_platform_with_info(url: str) -> dict:
@@ -99,17 +160,7 @@ def identify_platform_with_info(url: str) -> dict:
         - recognized: 是否成功识别
     """
     try:
-        parsed = urlparse(url)
-        hostname = parsed.hostname
-        
-        platform, requires_login = identify_platform(url)
-        
-        return {
-            'platform': platform,
-            'requires_login': requires_login,
-            'hostname': hostname,
-            'recognized': platform is not None
-        }
+        hostname = urlsplit(url).hostname
     except Exception as e:
         return {
             'platform': None,
@@ -119,6 +170,15 @@ def identify_platform_with_info(url: str) -> dict:
             'error': str(e)
         }
 
+    platform, requires_login = identify_hostname(hostname)
+
+    return {
+        'platform': platform,
+        'requires_login': requires_login,
+        'hostname': hostname,
+        'recognized': platform is not None
+    }
+
 
 if __name__ == '__main__':
     # 测试示例
@@ -130,6 +190,8 @@ if __name__ == '__main__':
         'https://www.douyin.com/video/123456',
         'https://item.taobao.com/item.htm?id=123456',
         'https://jd.com/123456.html',
+        'https://zhuanlan.zhihu.com/p/123456',
+        'https://v.douyin.com/xxxx/',
         'https://www.bilibili.com/video/BV1xx411c7mD',
         'https://unknown-site.com/article/123',
     ]
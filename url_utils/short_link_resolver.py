@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+短链接解析工具
+将 xhslink.com、b23.tv 等跳转短链接解析为真实地址，并持久化缓存解析结果
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple, Dict, Iterable, List, FrozenSet, Any
+from urllib.parse import urlsplit, urljoin
+
+# http.client / urllib.request 与线程池在首次解析时才导入，
+# 只调用 is_short_link() 的场景（如 CLI 启动）不加载网络模块
+
+
+# 已知的跳转短链接域名
+SHORT_LINK_HOSTS = frozenset({
+    'xhslink.com',      # 小红书
+    'b23.tv',           # B站
+    'v.douyin.com',     # 抖音
+    'm.tb.cn',          # 淘宝
+    'e.tb.cn',          # 淘宝
+    '3.cn',             # 京东
+    'u.jd.com',         # 京东
+    't.cn',             # 微博
+    'url.cn',           # 腾讯
+})
+
+# 默认缓存文件路径，可通过 SHORT_LINK_CACHE_PATH 环境变量修改
+DEFAULT_SHORT_LINK_CACHE_PATH = os.environ.get(
+    'SHORT_LINK_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.cache', 'cody_tools', 'short_links.sqlite3')
+)
+
+# resolve_many 共用的工作线程数量上限
+SHORT_LINK_MAX_WORKERS = 16
+
+# 部分短链接服务只对移动端返回跳转
+_USER_AGENT = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_0 like Mac OS X) "
+    "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.0 Mobile/15E148 Safari/604.1"
+)
+
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# 服务端不支持 HEAD 时改用 GET（只读响应头）
+_HEAD_UNSUPPORTED = (403, 404, 405, 501)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _host_of(url: str) -> str:
+    try:
+        return (urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return ''
+
+
+class _DirectResponse:
+    """_DirectTransport 返回的响应（与连接池响应的 status / headers / read / close 一致）"""
+
+    def __init__(self, response: Any, status: int):
+        self._response = response
+        self.status = status
+        self.headers = response.headers
+
+    def read(self) -> bytes:
+        return self._response.read()
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class _DirectTransport:
+    """
+    未注入连接池时使用：每次请求经 urllib 新建连接，不跟随跳转
+
+    遵守 HTTP_PROXY / HTTPS_PROXY / NO_PROXY 环境变量，但不复用连接。
+    """
+
+    def __init__(self):
+        import urllib.request
+
+        class NoRedirect(urllib.request.HTTPRedirectHandler):
+            def redirect_request(self, *args, **kwargs):
+                return None
+
+        self._opener = urllib.request.build_opener(NoRedirect)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        max_redirects: int = 0
+    ) -> _DirectResponse:
+        import urllib.error
+        import urllib.request
+
+        request = urllib.request.Request(url, headers=headers or {}, method=method)
+        try:
+            response = self._opener.open(request, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            # 3xx（未跟随）与 4xx/5xx 都以 HTTPError 返回
+            return _DirectResponse(e, e.code)
+        return _DirectResponse(response, response.getcode())
+
+
+def is_short_link(url: str, short_hosts: Iterable[str] = SHORT_LINK_HOSTS) -> bool:
+    """URL 是否为已知的跳转短链接"""
+    host = _host_of(url)
+    if host.startswith('www.'):
+        host = host[4:]
+    return host in short_hosts
+
+
+class ShortLinkResolver:
+    """
+    短链接解析器（线程安全）
+
+    - 逐跳请求短链接：优先 HEAD，不支持时用 GET 且不读取响应体
+    - 跳转目标离开短链接域名即停止，不请求最终页面
+    - 请求经由注入的连接池发出（如 web_reader.get_http_pool()，按主机复用 keep-alive 连接）；
+      未注入时每次请求经 urllib 新建连接
+    - 解析结果持久化到 SQLite（cache_path 为 None 时只缓存在内存中；
+      缓存文件无法创建或打开时同样退回内存缓存）
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = DEFAULT_SHORT_LINK_CACHE_PATH,
+        short_hosts: Iterable[str] = SHORT_LINK_HOSTS,
+        max_hops: int = 5,
+        timeout: float = 10,
+        pool: Optional[Any] = None
+    ):
+        """
+        Args:
+            pool: 连接池，需提供 request(method, url, headers=, timeout=, max_redirects=)，
+                返回带 status / headers / read() / close() 的响应；None 时使用 urllib
+        """
+        self.short_hosts: FrozenSet[str] = frozenset(h.lower() for h in short_hosts)
+        self.max_hops = max_hops
+        self.timeout = timeout
+        self._pool = pool
+        self._lock = threading.Lock()
+        # 缓存文件不可用时的错误信息（此时使用内存缓存）
+        self.cache_error: Optional[str] = None
+
+        try:
+            self._conn = self._open_cache(cache_path)
+        except (OSError, sqlite3.Error) as e:
+            self.cache_error = f"短链接缓存不可用，改用内存缓存: {e}"
+            self._conn = self._open_cache(None)
+
+    @staticmethod
+    def _open_cache(cache_path: Optional[str]) -> sqlite3.Connection:
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(cache_path or ':memory:', check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS short_links "
+            "(short TEXT PRIMARY KEY, long TEXT NOT NULL, resolved_at REAL NOT NULL)"
+        )
+        conn.commit()
+        return conn
+
+    def is_short_link(self, url: str) -> bool:
+        return is_short_link(url, self.short_hosts)
+
+    def cached(self, url: str) -> Optional[str]:
+        """返回缓存的解析结果（缓存读取失败视为未命中）"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT long FROM short_links WHERE short = ?", (url.strip(),)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def _store(self, short: str, long: str) -> None:
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO short_links (short, long, resolved_at) VALUES (?, ?, ?)",
+                    (short, long, time.time())
+                )
+                self._conn.commit()
+        except sqlite3.Error:
+            # 写入缓存失败不影响解析结果
+            pass
+
+    def _transport(self, pool: Optional[Any]) -> Any:
+        if pool is not None:
+            return pool
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = _DirectTransport()
+        return self._pool
+
+    def resolve(self, url: str, pool: Optional[Any] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        解析短链接
+
+        Args:
+            url: 短链接 URL（非短链接原样返回）
+            pool: 本次使用的连接池，None 时使用构造时传入的连接池
+
+        Returns:
+            Tuple[真实地址, 错误信息]
+        """
+        import http.client
+
+        if not url or not isinstance(url, str):
+            return None, "URL 不能为空"
+
+        url = url.strip()
+        if not self.is_short_link(url):
+            return url, None
+
+        cached = self.cached(url)
+        if cached:
+            return cached, None
+
+        current = url
+        transport = self._transport(pool)
+        try:
+            for _ in range(self.max_hops):
+                location = self._next_location(current, transport)
+                if not location:
+                    break
+                current = urljoin(current, location)
+                if not self.is_short_link(current):
+                    break
+            else:
+                return None, f"跳转次数超过 {self.max_hops} 次"
+        except (socket.timeout, TimeoutError):
+            return None, f"请求超时（{self.timeout}秒）"
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            return None, f"解析短链接失败: {e}"
+
+        if current == url:
+            return None, "短链接没有返回跳转地址"
+
+        self._store(url, current)
+        return current, None
+
+    def resolve_many(
+        self,
+        urls: Iterable[str],
+        concurrency: int = 8,
+        pool: Optional[Any] = None
+    ) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """
+        并发解析多个短链接（pool 同 resolve()）
+
+        Returns:
+            {原始 URL: (真实地址, 错误信息)}
+        """
+        from concurrent.futures import wait, FIRST_COMPLETED
+
+        unique: List[str] = list(dict.fromkeys(u.strip() for u in urls if u))
+        executor = _get_executor()
+        results: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        pending_urls = iter(unique)
+        running = {}
+
+        # 共用线程池，本次调用最多同时解析 concurrency 个
+        for url in pending_urls:
+            running[executor.submit(self.resolve, url, pool)] = url
+            if len(running) >= max(1, concurrency):
+                break
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+                url = next(pending_urls, None)
+                if url is not None:
+                    running[executor.submit(self.resolve, url, pool)] = url
+
+        return {url: results[url] for url in unique}
+
+    def _next_location(self, url: str, transport: Any) -> Optional[str]:
+        """请求一跳，返回 Location（无跳转时返回 None）"""
+        headers = {'User-Agent': _USER_AGENT}
+
+        for method in ('HEAD', 'GET'):
+            # 连接池负责复用连接，并在复用的连接已被服务端关闭时换新连接重试
+            response = transport.request(
+                method, url, headers=headers, timeout=self.timeout, max_redirects=0
+            )
+            if method == 'HEAD':
+                # HEAD 没有响应体，读完后连接归还连接池
+                response.read()
+            else:
+                # 不读取 GET 的响应体，直接关闭连接
+                response.close()
+
+            if response.status in _REDIRECT_STATUSES:
+                return response.headers.get('Location')
+            if method == 'HEAD' and response.status in _HEAD_UNSUPPORTED:
+                continue
+            return None
+
+        return None
+
+    def close(self) -> None:
+        """关闭缓存（注入的连接池由调用方管理，不在此关闭）"""
+        with self._lock:
+            self._conn.close()
+
+
+def _get_executor():
+    """获取 resolve_many 共用的线程池"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=SHORT_LINK_MAX_WORKERS,
+                thread_name_prefix='short-link-resolver'
+            )
+        return _executor
+
+
+_default_resolver: Optional[ShortLinkResolver] = None
+_default_resolver_lock = threading.Lock()
+
+
+def get_short_link_resolver() -> ShortLinkResolver:
+    """获取进程内共享的默认解析器"""
+    global _default_resolver
+    with _default_resolver_lock:
+        if _default_resolver is None:
+            _default_resolver = ShortLinkResolver()
+        return _default_resolver
+
+
+def resolve_short_link(url: str, pool: Optional[Any] = None) -> Tuple[Optional[str], Optional[str]]:
+    """使用默认解析器解析短链接，返回 (真实地址, 错误信息)；pool 见 ShortLinkResolver"""
+    return get_short_link_resolver().resolve(url, pool)
+
+
+def resolve_short_links(
+    urls: Iterable[str],
+    concurrency: int = 8,
+    pool: Optional[Any] = None
+) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """使用默认解析器并发解析多个短链接"""
+    return get_short_link_resolver().resolve_many(urls, concurrency, pool)
+
+
+if __name__ == '__main__':
+    # 测试示例
+    test_urls = [
+        'https://xhslink.com/xxxx',
+        'https://b23.tv/xxxx',
+        'https://www.zhihu.com/question/123456',
+    ]
+
+    print("短链接解析测试：")
+    print("-" * 60)
+
+    for url, (long_url, error) in resolve_short_links(test_urls).items():
+        if error:
+            print(f"✗ {url} -> {error}")
+        else:
+            print(f"✓ {url} -> {long_url}")
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+URL 规范化与去重工具
+去掉跟踪参数、统一协议与移动端域名，并按平台规则提取文章/商品的唯一标识，
+使同一内容的不同分享链接得到相同的规范 URL
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from typing import Optional, Iterable, Iterator, List, Tuple, Callable, Dict, Any
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# 通用跟踪参数（精确匹配，对所有站点生效）
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'yclid', 'msclkid', 'igshid',
+})
+
+# 通用跟踪参数前缀
+TRACKING_PARAM_PREFIXES = ('utm_', 'wxshare_')
+
+# 平台跟踪参数：域名后缀 -> 参数名，只对该平台生效
+# （scene、share_id 等在其他站点可能是有意义的参数）
+PLATFORM_TRACKING_PARAMS: Dict[str, frozenset] = {
+    'mp.weixin.qq.com': frozenset({
+        'chksm', 'scene', 'subscene', 'ascene', 'clicktime', 'enterid', 'sessionid',
+        'devicetype', 'nettype', 'pass_ticket', 'wx_header', 'exportkey',
+        'sharer_shareid', 'sharer_sharetime',
+    }),
+    'bilibili.com': frozenset({
+        'vd_source', 'unique_k', 'from_spmid', 'spm_id_from', 'share_source', 'share_from',
+        'share_medium', 'share_plat', 'share_session_id', 'share_tag',
+    }),
+    'xiaohongshu.com': frozenset({
+        'xsec_token', 'xsec_source', 'app_platform', 'app_version', 'author_share',
+        'share_from', 'share_id',
+    }),
+    'douyin.com': frozenset({
+        'u_code', 'share_id', 'is_copy_url', 'is_from_webapp', 'sender_device',
+    }),
+    'zhihu.com': frozenset({'share_code'}),
+    'taobao.com': frozenset({'spm', 'scm', 'ali_trackid', 'pvid'}),
+    'tmall.com': frozenset({'spm', 'scm', 'ali_trackid', 'pvid'}),
+    'jd.com': frozenset({'pvid'}),
+}
+
+# 淘宝 / 天猫商品详情页的主机名
+TAOBAO_ITEM_HOSTS = frozenset({'item.taobao.com', 'detail.tmall.com'})
+
+# 移动端 / 别名域名 -> 规范域名
+HOST_ALIASES = {
+    'm.zhihu.com': 'www.zhihu.com',
+    'zhihu.com': 'www.zhihu.com',
+    'm.bilibili.com': 'www.bilibili.com',
+    'bilibili.com': 'www.bilibili.com',
+    'm.douyin.com': 'www.douyin.com',
+    'douyin.com': 'www.douyin.com',
+    'xiaohongshu.com': 'www.xiaohongshu.com',
+    'm.xiaohongshu.com': 'www.xiaohongshu.com',
+    'm.jd.com': 'www.jd.com',
+    'jd.com': 'www.jd.com',
+    'item.m.jd.com': 'item.jd.com',
+    'm.taobao.com': 'www.taobao.com',
+    'taobao.com': 'www.taobao.com',
+    'h5.m.taobao.com': 'item.taobao.com',
+    'detail.m.tmall.com': 'detail.tmall.com',
+}
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_BV_RE = re.compile(r'(BV[0-9A-Za-z]{10})')
+_AV_RE = re.compile(r'/video/(av\d+)', re.IGNORECASE)
+_JD_ITEM_RE = re.compile(r'/(?:product/)?(\d+)\.html')
+_XHS_NOTE_RE = re.compile(r'/(?:explore|discovery/item|search_result)/([0-9a-f]{24})')
+_DOUYIN_VIDEO_RE = re.compile(r'/(?:video|note)/(\d+)')
+
+# 平台规则返回 (规范 URL 或 None)；None 表示交给通用规则处理
+CanonicalRule = Callable[[str, str, List[Tuple[str, str]]], Optional[str]]
+
+
+def _match_suffix(host: str, table: Dict[str, Any]) -> Optional[Any]:
+    """按域名后缀在 table 中查找（含子域名）"""
+    for suffix, value in table.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return value
+    return None
+
+
+def _is_tracking_param(name: str, platform_params: frozenset = frozenset()) -> bool:
+    lowered = name.lower()
+    return (
+        lowered in TRACKING_PARAMS
+        or lowered in platform_params
+        or lowered.startswith(TRACKING_PARAM_PREFIXES)
+    )
+
+
+def _pick(query: List[Tuple[str, str]], *names: str) -> List[Tuple[str, str]]:
+    """按 names 的顺序挑出指定参数"""
+    values = dict(query)
+    return [(name, values[name]) for name in names if values.get(name)]
+
+
+def _wechat_rule(host: str, path: str, query: List[Tuple[str, str]]) -> Optional[str]:
+    # 短链接 /s/<id> 本身就是唯一标识
+    if path.startswith('/s/') and len(path) > 3:
+        return f"https://mp.weixin.qq.com{path.rstrip('/')}"
+    # 长链接 /s?__biz=&mid=&idx=&sn=
+    kept = _pick(query, '__biz', 'mid', 'idx', 'sn')
+    if len(kept) == 4:
+        return f"https://mp.weixin.qq.com/s?{urlencode(kept)}"
+    return None
+
+
+def _bilibili_rule(host: str, path: str, query: List[Tuple[str, str]]) -> Optional[str]:
+    match = _BV_RE.search(path) or _AV_RE.search(path)
+    if not match:
+        return None
+    url = f"https://www.bilibili.com/video/{match.group(1)}"
+    # 多 P 视频保留分 P 参数
+    page = dict(query).get('p')
+    if page and page != '1':
+        url += f"?p={page}"
+    return url
+
+
+def _taobao_rule(host: str, path: str, query: List[Tuple[str, str]]) -> Optional[str]:
+    # 只有商品详情页的 id 是商品 ID（搜索等页面的 id 含义不同）
+    if host not in TAOBAO_ITEM_HOSTS:
+        return None
+    item_id = dict(query).get('id')
+    if item_id and item_id.isdigit():
+        # 淘宝与天猫共用商品 ID
+        return f"https://item.taobao.com/item.htm?id={item_id}"
+    return None
+
+
+def _jd_rule(host: str, path: str, query: List[Tuple[str, str]]) -> Optional[str]:
+    match = _JD_ITEM_RE.search(path)
+    if host.startswith('item.') and match:
+        return f"https://item.jd.com/{match.group(1)}.html"
+    return None
+
+
+def _xiaohongshu_rule(host: str, path: str, query: List[Tuple[str, str]]) -> Optional[str]:
+    match = _XHS_NOTE_RE.search(path)
+    if match:
+        return f"https://www.xiaohongshu.com/explore/{match.group(1)}"
+    return None
+
+
+def _douyin_rule(host: str, path: str, query: List[Tuple[str, str]]) -> Optional[str]:
+    match = _DOUYIN_VIDEO_RE.search(path)
+    if match:
+        return f"https://www.douyin.com/video/{match.group(1)}"
+    return None
+
+
+def _zhihu_rule(host: str, path: str, query: List[Tuple[str, str]]) -> Optional[str]:
+    # 专栏文章、问题、回答的标识都在路径中，查询参数均可丢弃
+    if path.startswith(('/p/', '/question/', '/answer/', '/pin/')):
+        return f"https://{host}{path.rstrip('/')}"
+    return None
+
+
+# 平台规则：域名后缀 -> 规则函数
+CANONICAL_RULES: Dict[str, CanonicalRule] = {
+    'mp.weixin.qq.com': _wechat_rule,
+    'bilibili.com': _bilibili_rule,
+    'taobao.com': _taobao_rule,
+    'tmall.com': _taobao_rule,
+    'jd.com': _jd_rule,
+    'xiaohongshu.com': _xiaohongshu_rule,
+    'douyin.com': _douyin_rule,
+    'zhihu.com': _zhihu_rule,
+}
+
+
+def _find_rule(host: str) -> Optional[CanonicalRule]:
+    return _match_suffix(host, CANONICAL_RULES)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    生成规范 URL
+
+    - 统一为 https，主机名小写，去掉默认端口与片段（#/ 或 #! 开头的前端路由片段保留）
+    - 移动端 / 别名域名映射为规范域名（见 HOST_ALIASES）
+    - 按平台规则只保留唯一标识（微信 __biz/mid/idx/sn、B站 BV 号、淘宝商品 id 等）
+    - 其余页面去掉通用跟踪参数（utm_* 等）与该平台的跟踪参数，并按参数名排序
+
+    Args:
+        url: 输入的 URL 字符串
+
+    Returns:
+        规范 URL；无法解析时返回去掉首尾空白的原始字符串
+    """
+    raw = url.strip()
+    try:
+        parts = urlsplit(raw)
+        host = (parts.hostname or '').lower().rstrip('.')
+        port = parts.port
+    except ValueError:
+        return raw
+
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not host:
+        return raw
+
+    host = HOST_ALIASES.get(host, host)
+    path = parts.path or '/'
+    query = parse_qsl(parts.query, keep_blank_values=True)
+
+    rule = _find_rule(host)
+    if rule is not None:
+        canonical = rule(host, path, query)
+        if canonical:
+            return canonical
+
+    # hostname 去掉了 IPv6 地址的方括号，拼回 netloc 时需要补上
+    netloc = f"[{host}]" if ':' in host else host
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+
+    if path != '/':
+        path = path.rstrip('/')
+
+    platform_params = _match_suffix(host, PLATFORM_TRACKING_PARAMS) or frozenset()
+    kept = sorted((k, v) for k, v in query if not _is_tracking_param(k, platform_params))
+
+    # 单页应用的前端路由（#/post/1、#!/post/1）决定页面内容，不能丢弃
+    fragment = parts.fragment if parts.fragment.startswith(('/', '!')) else ''
+    return urlunsplit(('https', netloc, path, urlencode(kept), fragment))
+
+
+class DedupIndex:
+    """
+    规范 URL 去重索引（线程安全）
+
+    批量任务在抓取前查询，跳过已处理过的内容；抓取成功后再调用 add() 记录，
+    失败的 URL 不记录，下次仍会重试。path 为 None 时只保存在内存中，
+    否则持久化到 SQLite 文件，可跨进程、跨批次复用。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        db_path = path or ':memory:'
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (canonical TEXT PRIMARY KEY, url TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def __contains__(self, url: str) -> bool:
+        return self.seen(url)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def seen(self, url: str) -> bool:
+        """URL（按规范形式）是否已记录"""
+        canonical = canonicalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM seen WHERE canonical = ?", (canonical,)
+            ).fetchone()
+        return row is not None
+
+    def add(self, url: str) -> bool:
+        """记录 URL，返回是否为新内容"""
+        canonical = canonicalize_url(url)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO seen (canonical, url) VALUES (?, ?)",
+                (canonical, url)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def filter_new(self, urls: Iterable[str], record: bool = False) -> Iterator[str]:
+        """
+        过滤出未处理过的 URL（批次内重复的也只保留第一个）
+
+        Args:
+            urls: 待处理的 URL
+            record: 是否在返回前就把 URL 记入索引；默认不记录，
+                由调用方在抓取成功后调用 add()，避免失败的 URL 之后被跳过
+        """
+        batch_seen = set()
+        for url in urls:
+            canonical = canonicalize_url(url)
+            if canonical in batch_seen:
+                continue
+            batch_seen.add(canonical)
+            if record:
+                if self.add(url):
+                    yield url
+            elif not self.seen(url):
+                yield url
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == '__main__':
+    # 测试示例
+    test_urls = [
+        'http://mp.weixin.qq.com/s?__biz=MzA&mid=2650&idx=1&sn=abc&chksm=xyz&scene=21#wechat_redirect',
+        'https://m.bilibili.com/video/BV1xx411c7mD?share_source=copy_web&vd_source=123',
+        'https://detail.tmall.com/item.htm?id=123456&spm=a1z10.1-b',
+        'https://item.m.jd.com/product/100012043978.html?utm_source=x',
+        'https://zhuanlan.zhihu.com/p/123456?utm_psn=1&share_code=abc',
+        'https://www.example.com/article/?b=2&utm_medium=social&a=1',
+    ]
+
+    print("URL 规范化测试：")
+    print("-" * 60)
+
+    for url in test_urls:
+        print(f"{url}\n  -> {canonicalize_url(url)}")
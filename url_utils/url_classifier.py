@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+URL 批量分类工具
+从文本文件、标准输入或浏览器历史记录（SQLite）中流式读取 URL，
+输出各平台数量统计，以及逐条分类结果（JSONL）
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple, TextIO, Dict
+from urllib.parse import urlsplit
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from url_utils.platform_identifier import identify_hostname
+
+
+# 从日志行中提取 URL
+_URL_RE = re.compile(r'https?://[^\s"\'<>`]+', re.IGNORECASE)
+
+# URL 末尾常见的标点（来自句子或 Markdown），不属于 URL 本身
+_TRAILING_PUNCTUATION = '.,;:!?)]}>，。；：！？）】》'
+
+# 浏览器历史记录表：(表名, URL 列)
+# Chrome / Edge: urls；Firefox: moz_places；Safari: history_items
+HISTORY_TABLES = (
+    ('urls', 'url'),
+    ('moz_places', 'url'),
+    ('history_items', 'url'),
+)
+
+# 未识别平台在统计中的名称
+UNKNOWN_PLATFORM = '未知'
+
+# (URL, 主机名, 平台名称, 是否需要登录)
+Classification = Tuple[str, Optional[str], Optional[str], bool]
+
+
+def iter_urls_from_lines(lines: Iterable[str]) -> Iterator[str]:
+    """从文本行中逐个提取 URL（一行可包含多个 URL，其余文字忽略）"""
+    for line in lines:
+        for match in _URL_RE.finditer(line):
+            url = match.group(0).rstrip(_TRAILING_PUNCTUATION)
+            if url:
+                yield url
+
+
+def iter_urls_from_file(path: str) -> Iterator[str]:
+    """从文本文件逐行读取 URL，path 为 '-' 时读取标准输入"""
+    if path == '-':
+        yield from iter_urls_from_lines(sys.stdin)
+        return
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        yield from iter_urls_from_lines(f)
+
+
+def iter_urls_from_history(path: str) -> Iterator[str]:
+    """
+    从浏览器历史记录数据库读取 URL
+
+    支持 Chrome / Edge（History）、Firefox（places.sqlite）与 Safari（History.db）。
+    浏览器运行时会锁定数据库，建议先复制一份再读取。
+    """
+    # 路径中的 ?、#、% 需转义后才能放进 URI
+    uri = Path(os.path.abspath(path)).as_uri() + '?mode=ro'
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        tables = {
+            row[0] for row in
+            conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+        for table, column in HISTORY_TABLES:
+            if table in tables:
+                break
+        else:
+            raise ValueError(f"未找到浏览器历史记录表: {path}")
+
+        # 游标逐行读取，不一次性加载全部结果
+        for (url,) in conn.execute(f"SELECT {column} FROM {table}"):
+            if isinstance(url, str) and url.startswith(('http://', 'https://')):
+                yield url
+    finally:
+        conn.close()
+
+
+def classify_urls(urls: Iterable[str]) -> Iterator[Classification]:
+    """
+    逐个识别 URL 所属平台（惰性迭代，每个 URL 只解析一次）
+
+    Yields:
+        Tuple[URL, 主机名, 平台名称, 是否需要登录]
+    """
+    for url in urls:
+        try:
+            hostname = urlsplit(url).hostname
+        except ValueError:
+            hostname = None
+        platform, requires_login = identify_hostname(hostname)
+        yield url, hostname, platform, requires_login
+
+
+def write_jsonl(records: Iterable[Classification], output: TextIO) -> Iterator[Classification]:
+    """把分类结果逐行写为 JSON，同时原样传递给下游"""
+    for record in records:
+        url, hostname, platform, requires_login = record
+        output.write(json.dumps({
+            'url': url,
+            'hostname': hostname,
+            'platform': platform,
+            'requires_login': requires_login,
+        }, ensure_ascii=False))
+        output.write('\n')
+        yield record
+
+
+def count_platforms(records: Iterable[Classification]) -> Dict[str, int]:
+    """消费分类结果，返回 {平台名称: 数量}（按数量降序）"""
+    counts: Counter = Counter()
+    for _, _, platform, _ in records:
+        counts[platform or UNKNOWN_PLATFORM] += 1
+    return dict(counts.most_common())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='URL 批量分类 - 统计日志、URL 列表或浏览器历史记录中各平台的链接数量'
+    )
+    parser.add_argument(
+        'input',
+        nargs='?',
+        default='-',
+        help='输入文件（每行可包含 URL 的文本文件；默认或 - 表示标准输入）'
+    )
+    parser.add_argument(
+        '--history',
+        action='store_true',
+        help='输入为浏览器历史记录数据库（Chrome History / Firefox places.sqlite / Safari History.db）'
+    )
+    parser.add_argument(
+        '--jsonl', '-o',
+        help='逐条分类结果输出为 JSONL（- 表示标准输出）'
+    )
+    parser.add_argument(
+        '--recognized-only',
+        action='store_true',
+        help='只输出识别到平台的 URL'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='统计结果以 JSON 格式输出'
+    )
+
+    args = parser.parse_args()
+
+    if args.history and args.input == '-':
+        parser.error('--history 需要指定数据库文件路径')
+
+    # 组装流水线：读取 -> 分类 -> [过滤] -> [写 JSONL] -> 统计
+    if args.history:
+        urls = iter_urls_from_history(args.input)
+    else:
+        urls = iter_urls_from_file(args.input)
+
+    records = classify_urls(urls)
+    if args.recognized_only:
+        records = (record for record in records if record[2] is not None)
+
+    jsonl_file = None
+    if args.jsonl == '-':
+        records = write_jsonl(records, sys.stdout)
+    elif args.jsonl:
+        jsonl_file = open(args.jsonl, 'w', encoding='utf-8')
+        records = write_jsonl(records, jsonl_file)
+
+    # JSONL 写到标准输出时，统计结果输出到标准错误
+    summary_output = sys.stderr if args.jsonl == '-' else sys.stdout
+
+    try:
+        counts = count_platforms(records)
+    except (OSError, sqlite3.Error, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        if jsonl_file is not None:
+            jsonl_file.close()
+
+    if args.json:
+        print(json.dumps(counts, ensure_ascii=False, indent=2), file=summary_output)
+        return
+
+    total = sum(counts.values())
+    print(f"共 {total} 个 URL", file=summary_output)
+    print("-" * 40, file=summary_output)
+    for platform, count in counts.items():
+        share = count / total * 100 if total else 0
+        print(f"{platform:<12} {count:>10}  {share:5.1f}%", file=summary_output)
+
+
+if __name__ == '__main__':
+    main()
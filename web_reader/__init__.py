@@ -1,28 +1,86 @@
-from .jina_reader import (
-    read_webpage as read_with_jina,
-    read_webpage_with_meta,
-    JINA_READER_BASE
-)
-from .playwright_reader import (
-    read_webpage_playwright,
-    read_webpage as read_with_playwright,
-    save_storage_state
-)
-from .firecrawl_reader import (
-    read_webpage_firecrawl,
-    read_webpage as read_with_firecrawl
+"""
+网页读取后端
+
+各后端（尤其是依赖 playwright、firecrawl 的模块）在首次访问对应名称时才导入，
+未安装的可选依赖不影响其他后端的使用。
+"""
+
+import importlib
+
+from .backends import (
+    BACKENDS,
+    is_backend_available,
+    available_backends,
+    missing_backend_message,
+    load_backend
 )
 
-__all__ = [
+# 导出名称 -> (模块, 模块内名称)，首次访问时导入
+_LAZY_EXPORTS = {
     # Jina Reader
-    'read_with_jina',
-    'read_webpage_with_meta',
-    'JINA_READER_BASE',
+    'read_with_jina': ('jina_reader', 'read_webpage'),
+    'read_webpage_with_meta': ('jina_reader', 'read_webpage_with_meta'),
+    'read_with_jina_async': ('jina_reader', 'read_webpage_async'),
+    'read_webpage_with_meta_async': ('jina_reader', 'read_webpage_with_meta_async'),
+    'read_many_with_jina': ('jina_reader', 'read_many'),
+    'JINA_READER_BASE': ('jina_reader', 'JINA_READER_BASE'),
     # Playwright Reader
-    'read_webpage_playwright',
-    'read_with_playwright',
-    'save_storage_state',
+    'read_webpage_playwright': ('playwright_reader', 'read_webpage_playwright'),
+    'read_webpages_playwright': ('playwright_reader', 'read_webpages_playwright'),
+    'read_with_playwright': ('playwright_reader', 'read_webpage'),
+    'save_storage_state': ('playwright_reader', 'save_storage_state'),
+    'RESOURCE_BLOCK_PRESETS': ('playwright_reader', 'RESOURCE_BLOCK_PRESETS'),
+    'PLATFORM_CONTENT_SELECTORS': ('playwright_reader', 'PLATFORM_CONTENT_SELECTORS'),
+    # Playwright 浏览器池
+    'BrowserPool': ('browser_pool', 'BrowserPool'),
+    'get_browser_pool': ('browser_pool', 'get_browser_pool'),
+    'configure_browser_pool': ('browser_pool', 'configure_browser_pool'),
+    'close_browser_pool': ('browser_pool', 'close_browser_pool'),
+    # HTTP 连接池
+    'HTTPConnectionPool': ('http_pool', 'HTTPConnectionPool'),
+    'get_http_pool': ('http_pool', 'get_http_pool'),
+    'configure_http_pool': ('http_pool', 'configure_http_pool'),
+    # 自适应限流
+    'AdaptiveRateLimiter': ('rate_limiter', 'AdaptiveRateLimiter'),
+    'get_rate_limiter': ('rate_limiter', 'get_rate_limiter'),
+    'configure_rate_limiter': ('rate_limiter', 'configure_rate_limiter'),
+    'parse_retry_after': ('rate_limiter', 'parse_retry_after'),
+    'RATE_LIMITED_ERROR': ('rate_limiter', 'RATE_LIMITED_ERROR'),
+    'is_rate_limited_error': ('rate_limiter', 'is_rate_limited_error'),
+    # 后台事件循环
+    'run_sync': ('event_loop', 'run_sync'),
+    'get_background_loop': ('event_loop', 'get_background_loop'),
+    'shutdown_background_loop': ('event_loop', 'shutdown_background_loop'),
     # Firecrawl Reader
-    'read_webpage_firecrawl',
-    'read_with_firecrawl',
+    'read_webpage_firecrawl': ('firecrawl_reader', 'read_webpage_firecrawl'),
+    'read_with_firecrawl': ('firecrawl_reader', 'read_webpage'),
+    'read_webpages_firecrawl': ('firecrawl_reader', 'read_webpages_firecrawl'),
+    'get_firecrawl_client': ('firecrawl_reader', 'get_firecrawl_client'),
+    'clear_firecrawl_clients': ('firecrawl_reader', 'clear_firecrawl_clients'),
+}
+
+
+def __getattr__(name):
+    try:
+        module_name, attr = _LAZY_EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(f".{module_name}", __name__), attr)
+    # 缓存到模块字典，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
+
+__all__ = [
+    # 后端注册表
+    'BACKENDS',
+    'is_backend_available',
+    'available_backends',
+    'missing_backend_message',
+    'load_backend',
+    *_LAZY_EXPORTS,
 ]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+读取后端注册表
+记录各后端所在模块及其可选依赖，只检查依赖是否已安装而不导入，
+供调用方在首次使用时再加载对应模块
+"""
+
+import importlib
+import importlib.util
+import sys
+from functools import lru_cache
+from types import ModuleType
+from typing import Dict, Any, List
+
+
+# 后端名称 -> 模块、可选依赖与安装提示
+BACKENDS: Dict[str, Dict[str, Any]] = {
+    'jina': {
+        'module': 'jina_reader',
+        'requires': (),
+        'install': None,
+    },
+    'firecrawl': {
+        'module': 'firecrawl_reader',
+        'requires': ('firecrawl',),
+        'install': 'pip install firecrawl-py',
+    },
+    'playwright': {
+        'module': 'playwright_reader',
+        'requires': ('playwright',),
+        'install': 'pip install playwright && playwright install chromium',
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def _module_installed(name: str) -> bool:
+    """依赖是否已安装（不执行导入）"""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def is_backend_available(name: str) -> bool:
+    """后端的依赖是否都已安装"""
+    backend = BACKENDS.get(name)
+    if backend is None:
+        return False
+    return all(_module_installed(dep) for dep in backend['requires'])
+
+
+def available_backends() -> List[str]:
+    """返回依赖已安装的后端名称"""
+    return [name for name in BACKENDS if is_backend_available(name)]
+
+
+def missing_backend_message(name: str) -> str:
+    """后端不可用时的提示信息"""
+    backend = BACKENDS.get(name)
+    if backend is None:
+        return f"未知后端: {name}"
+    return f"未安装 {name}，请先运行: {backend['install']}"
+
+
+def load_backend(name: str) -> ModuleType:
+    """
+    导入后端模块
+
+    Raises:
+        ImportError: 后端未知或依赖未安装
+    """
+    if not is_backend_available(name):
+        raise ImportError(missing_backend_message(name))
+    return importlib.import_module(f".{BACKENDS[name]['module']}", __package__)
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Playwright 浏览器池
+长期持有 Chromium 浏览器与上下文，避免每次读取都重新启动浏览器
+"""
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from playwright.async_api import async_playwright, Playwright, Browser, BrowserContext, Page
+
+
+# 默认池配置，可通过 configure_browser_pool() 修改
+BROWSER_POOL_DEFAULTS: Dict[str, Any] = {
+    'max_browsers': 2,               # 同时存在的浏览器数量上限
+    'max_contexts_per_browser': 4,   # 每个浏览器的上下文数量上限
+    'max_pages_per_context': 4,      # 每个上下文同时打开的页面数量上限
+    'max_pages_per_browser': 200,    # 每个浏览器服务多少个页面后回收重启
+    'headless': True,
+}
+
+# 上下文复用键：(user_agent, storage_state)
+ContextKey = Tuple[str, Optional[str]]
+
+
+class _PooledContext:
+    """池内的单个上下文，可同时承载多个页面"""
+
+    def __init__(self, key: ContextKey, context: BrowserContext):
+        self.key = key
+        self.context = context
+        self.in_use = 0
+
+
+class _PooledBrowser:
+    """池内的单个浏览器及其上下文"""
+
+    def __init__(self, browser: Browser):
+        self.browser = browser
+        self.contexts: List[_PooledContext] = []
+        self.creating = 0
+        self.active = 0
+        self.pages_served = 0
+        self.retiring = False
+
+    @property
+    def context_count(self) -> int:
+        return len(self.contexts) + self.creating
+
+    def is_healthy(self) -> bool:
+        return not self.retiring and self.browser.is_connected()
+
+
+class _Lease:
+    """一次上下文借用记录"""
+
+    def __init__(self, owner: _PooledBrowser, pooled_context: _PooledContext):
+        self.owner = owner
+        self.pooled_context = pooled_context
+
+    @property
+    def context(self) -> BrowserContext:
+        return self.pooled_context.context
+
+
+class BrowserPool:
+    """
+    Chromium 浏览器池
+
+    - 最多 max_browsers 个浏览器，每个最多 max_contexts_per_browser 个上下文
+    - 上下文按 (user_agent, storage_state) 复用，保留登录态与缓存，
+      同一上下文最多同时打开 max_pages_per_context 个页面
+    - 浏览器断开连接时自动剔除，服务满 max_pages_per_browser 个页面后回收
+    - 必须在创建它的事件循环中使用，结束时调用 close()
+    """
+
+    def __init__(
+        self,
+        max_browsers: int = 2,
+        max_contexts_per_browser: int = 4,
+        max_pages_per_context: int = 4,
+        max_pages_per_browser: int = 200,
+        headless: bool = True
+    ):
+        self.max_browsers = max(1, max_browsers)
+        self.max_contexts_per_browser = max(1, max_contexts_per_browser)
+        self.max_pages_per_context = max(1, max_pages_per_context)
+        self.max_pages_per_browser = max(1, max_pages_per_browser)
+        self.headless = headless
+
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[_PooledBrowser] = []
+        self._launching = 0
+        self._cond: Optional[asyncio.Condition] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.closed = False
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    @property
+    def capacity(self) -> int:
+        """池可同时打开的页面总数"""
+        return self.max_browsers * self.max_contexts_per_browser * self.max_pages_per_context
+
+    async def _ensure_started(self) -> None:
+        if self.closed:
+            raise RuntimeError("浏览器池已关闭")
+        if self._cond is None:
+            self._loop = asyncio.get_running_loop()
+            self._cond = asyncio.Condition()
+            self._start_lock = asyncio.Lock()
+        if self._playwright is not None:
+            return
+        # 首批并发的 acquire() 只启动一个 Playwright 驱动，其余等待其完成
+        async with self._start_lock:
+            if self._playwright is not None:
+                return
+            playwright = await async_playwright().start()
+            if self.closed:
+                await _stop_quietly(playwright)
+                raise RuntimeError("浏览器池已关闭")
+            self._playwright = playwright
+
+    async def acquire(self, user_agent: str, storage_state: Optional[str] = None) -> _Lease:
+        """借出一个匹配 (user_agent, storage_state) 的上下文"""
+        await self._ensure_started()
+        key: ContextKey = (user_agent, storage_state)
+
+        async with self._cond:
+            while True:
+                if self.closed:
+                    raise RuntimeError("浏览器池已关闭")
+                self._purge()
+
+                # 1. 复用同键且还有页面空位的上下文（优先最空闲的）
+                candidates = [
+                    (pc.in_use, pooled, pc)
+                    for pooled in self._browsers if pooled.is_healthy()
+                    for pc in pooled.contexts
+                    if pc.key == key and pc.in_use < self.max_pages_per_context
+                ]
+                if candidates:
+                    _, pooled, pc = min(candidates, key=lambda c: c[0])
+                    pc.in_use += 1
+                    pooled.active += 1
+                    return _Lease(pooled, pc)
+
+                # 2. 在有空位的浏览器中新建上下文
+                pooled = self._find_capacity()
+                if pooled is not None:
+                    pooled.creating += 1
+                    pooled.active += 1
+                    break
+
+                # 3. 启动新的浏览器
+                if len(self._browsers) + self._launching < self.max_browsers:
+                    self._launching += 1
+                    pooled = None
+                    break
+
+                await self._cond.wait()
+
+        if pooled is None:
+            try:
+                browser = await self._playwright.chromium.launch(headless=self.headless)
+            except Exception:
+                async with self._cond:
+                    self._launching -= 1
+                    self._cond.notify_all()
+                raise
+            pooled = _PooledBrowser(browser)
+            pooled.creating += 1
+            pooled.active += 1
+            async with self._cond:
+                self._launching -= 1
+                self._browsers.append(pooled)
+
+        try:
+            options: Dict[str, Any] = {'user_agent': user_agent}
+            if storage_state:
+                options['storage_state'] = storage_state
+            context = await pooled.browser.new_context(**options)
+        except Exception:
+            async with self._cond:
+                pooled.creating -= 1
+                pooled.active -= 1
+                self._cond.notify_all()
+            raise
+
+        async with self._cond:
+            pooled.creating -= 1
+            pc = _PooledContext(key, context)
+            pc.in_use = 1
+            pooled.contexts.append(pc)
+            # 唤醒等待同键上下文的协程
+            self._cond.notify_all()
+        return _Lease(pooled, pc)
+
+    async def release(self, lease: _Lease, healthy: bool = True) -> None:
+        """归还上下文；healthy=False 时关闭该上下文"""
+        pooled = lease.owner
+        pc = lease.pooled_context
+        close_context = False
+        close_browser = False
+
+        async with self._cond:
+            pc.in_use -= 1
+            pooled.active -= 1
+            pooled.pages_served += 1
+            if pooled.pages_served >= self.max_pages_per_browser:
+                pooled.retiring = True
+
+            if not healthy or self.closed or not pooled.browser.is_connected():
+                # 上下文不可用：从池中移除，等其它页面用完后关闭
+                if pc in pooled.contexts:
+                    pooled.contexts.remove(pc)
+                close_context = pc.in_use == 0
+            elif pc not in pooled.contexts:
+                # 已被标记移除的上下文，最后一个页面归还时关闭
+                close_context = pc.in_use == 0
+
+            if pooled.retiring and pooled.active == 0 and pooled in self._browsers:
+                self._browsers.remove(pooled)
+                close_browser = True
+
+            self._cond.notify_all()
+
+        if close_context:
+            await _close_quietly(pc.context)
+        if close_browser:
+            await _close_browser(pooled)
+
+    @asynccontextmanager
+    async def page(
+        self,
+        user_agent: str,
+        storage_state: Optional[str] = None
+    ) -> AsyncIterator[Page]:
+        """借出上下文并打开一个新页面，退出时关闭页面并归还上下文"""
+        lease = await self.acquire(user_agent, storage_state)
+        healthy = True
+        page: Optional[Page] = None
+        try:
+            page = await lease.context.new_page()
+            yield page
+        except Exception:
+            # 页面都无法创建时上下文已不可用
+            if page is None:
+                healthy = False
+            raise
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    healthy = False
+            await self.release(lease, healthy=healthy)
+
+    def _find_capacity(self) -> Optional[_PooledBrowser]:
+        """查找还能新建上下文的浏览器（必要时淘汰其它键的空闲上下文）"""
+        for pooled in self._browsers:
+            if pooled.is_healthy() and pooled.context_count < self.max_contexts_per_browser:
+                return pooled
+        for pooled in self._browsers:
+            if not pooled.is_healthy():
+                continue
+            for pc in pooled.contexts:
+                if pc.in_use == 0:
+                    pooled.contexts.remove(pc)
+                    asyncio.ensure_future(_close_quietly(pc.context))
+                    return pooled
+        return None
+
+    def _purge(self) -> None:
+        """健康检查：剔除已断开或待回收且空闲的浏览器"""
+        for pooled in list(self._browsers):
+            disconnected = not pooled.browser.is_connected()
+            if disconnected or (pooled.retiring and pooled.active == 0):
+                self._browsers.remove(pooled)
+                asyncio.ensure_future(_close_browser(pooled))
+
+    async def close(self) -> None:
+        """关闭池内所有浏览器并停止 Playwright"""
+        self.closed = True
+        browsers, self._browsers = self._browsers, []
+        for pooled in browsers:
+            await _close_browser(pooled)
+        if self._playwright is not None:
+            await _stop_quietly(self._playwright)
+            self._playwright = None
+        if self._cond is not None:
+            async with self._cond:
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回池的当前状态"""
+        return {
+            'browsers': len(self._browsers),
+            'contexts': sum(len(b.contexts) for b in self._browsers),
+            'active_pages': sum(b.active for b in self._browsers),
+            'pages_served': sum(b.pages_served for b in self._browsers),
+        }
+
+
+async def _close_quietly(target: Any) -> None:
+    try:
+        await target.close()
+    except Exception:
+        pass
+
+
+async def _stop_quietly(playwright: Playwright) -> None:
+    try:
+        await playwright.stop()
+    except Exception:
+        pass
+
+
+async def _close_browser(pooled: _PooledBrowser) -> None:
+    for pc in pooled.contexts:
+        await _close_quietly(pc.context)
+    pooled.contexts.clear()
+    await _close_quietly(pooled.browser)
+
+
+# 每个事件循环各自持有一个默认池
+_pools: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BrowserPool]' = weakref.WeakKeyDictionary()
+
+
+def configure_browser_pool(**options: Any) -> None:
+    """
+    修改默认浏览器池配置（对之后新建的池生效）
+
+    可选键: max_browsers, max_contexts_per_browser, max_pages_per_context,
+           max_pages_per_browser, headless
+    """
+    unknown = set(options) - set(BROWSER_POOL_DEFAULTS)
+    if unknown:
+        raise ValueError(f"未知的浏览器池配置: {', '.join(sorted(unknown))}")
+    BROWSER_POOL_DEFAULTS.update(options)
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    获取当前事件循环的默认浏览器池（不存在时创建）
+
+    Playwright 对象绑定在事件循环上，因此池只在创建它的循环中复用。
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None or pool.closed:
+        pool = BrowserPool(**BROWSER_POOL_DEFAULTS)
+        _pools[loop] = pool
+    return pool
+
+
+async def close_browser_pool() -> None:
+    """关闭当前事件循环的默认浏览器池（关闭钩子）"""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None and not pool.closed:
+        await pool.close()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+后台事件循环
+在独立线程中长期运行一个事件循环，供同步封装提交协程，
+使浏览器池等异步资源可以跨同步调用复用
+"""
+
+import asyncio
+import atexit
+import threading
+from typing import Optional, Any, Callable, Awaitable, List, Coroutine
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+# 关闭循环前依次执行的异步清理函数（如关闭浏览器池）
+_shutdown_hooks: List[Callable[[], Awaitable[Any]]] = []
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """获取后台事件循环，首次调用时启动后台线程"""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed() or _thread is None or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_run_loop,
+                args=(_loop,),
+                name='web-reader-loop',
+                daemon=True
+            )
+            _thread.start()
+        return _loop
+
+
+def in_background_loop() -> bool:
+    """当前线程是否为后台事件循环线程"""
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def run_sync(coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+    """
+    在后台事件循环中执行协程并阻塞等待结果
+
+    Args:
+        coro: 要执行的协程
+        timeout: 等待结果的超时时间（秒），默认不限制
+
+    Returns:
+        协程的返回值（协程抛出的异常会原样抛出）
+    """
+    if in_background_loop():
+        coro.close()
+        raise RuntimeError("不能在后台事件循环线程中调用 run_sync，请直接 await")
+
+    future = asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def register_shutdown_hook(hook: Callable[[], Awaitable[Any]]) -> None:
+    """注册在后台循环关闭前执行的异步清理函数"""
+    if hook not in _shutdown_hooks:
+        _shutdown_hooks.append(hook)
+
+
+def shutdown_background_loop(timeout: float = 10) -> None:
+    """执行清理函数并停止后台事件循环"""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop, _thread = None, None
+
+    if loop is None or loop.is_closed() or thread is None or not thread.is_alive():
+        return
+
+    async def _cleanup():
+        for hook in _shutdown_hooks:
+            try:
+                await hook()
+            except Exception:
+                pass
+
+    try:
+        asyncio.run_coroutine_threadsafe(_cleanup(), loop).result(timeout)
+    except Exception:
+        pass
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+    if not thread.is_alive():
+        loop.close()
+
+
+atexit.register(shutdown_background_loop)
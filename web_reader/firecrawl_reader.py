@@ -5,20 +5,249 @@ Firecrawl 网页内容提取工具
 """
 
 import os
-from typing import Optional, Tuple, Dict, Any
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Optional, Tuple, Dict, Any, List
+from urllib.parse import urlsplit, urlunsplit
 
-# 尝试导入 firecrawl，如果未安装给出友好提示
-try:
-    from firecrawl import FirecrawlApp
-except ImportError:
-    FirecrawlApp = None
+# 添加上级目录到路径，以便导入其他模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_reader.rate_limiter import AdaptiveRateLimiter, get_rate_limiter, parse_retry_after, rate_limited_error
+
+# firecrawl SDK 导入较慢，首次创建客户端时才导入（见 _firecrawl_app_class）
+FirecrawlApp = None
+
+
+# 执行 Firecrawl 请求的工作线程数量上限（用于强制超时）
+FIRECRAWL_MAX_WORKERS = 16
+
+# 超时后仍未结束的调用达到该数量时换用新的线程池，避免卡住的调用占满线程
+FIRECRAWL_MAX_ABANDONED = FIRECRAWL_MAX_WORKERS // 2
+
+# 按 (api_key, api_url) 缓存的客户端
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_clients_lock = threading.Lock()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# 当前线程池中已超时但仍在运行的调用数
+_abandoned = 0
+
+_VERIFICATION_ERROR = "页面可能包含验证机制"
+
+# 页面 metadata 中的状态码为这些值时视为目标站点限流/拦截
+FIRECRAWL_HOST_THROTTLE_STATUSES = (403, 429)
+
+_HOST_BLOCKED_ERROR = "目标站点限制访问"
+
+
+def _firecrawl_app_class():
+    """导入并返回 FirecrawlApp，未安装时返回 None"""
+    global FirecrawlApp
+    if FirecrawlApp is None:
+        try:
+            from firecrawl import FirecrawlApp as app_class
+        except ImportError:
+            return None
+        FirecrawlApp = app_class
+    return FirecrawlApp
+
+
+def get_firecrawl_client(api_key: str, api_url: Optional[str] = None):
+    """
+    获取缓存的 FirecrawlApp 客户端（线程安全）
+    
+    同一 (api_key, api_url) 复用同一个客户端及其底层 HTTP 会话。
+    
+    Args:
+        api_key: Firecrawl API Key
+        api_url: API 地址，默认使用 FIRECRAWL_API_URL 环境变量或官方地址，
+                 测试时可指向本地替身服务
+    """
+    if api_url is None:
+        api_url = os.environ.get('FIRECRAWL_API_URL') or None
+    
+    key = (api_key, api_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            app_class = _firecrawl_app_class()
+            if app_class is None:
+                raise ImportError("请先安装 firecrawl: pip install firecrawl-py")
+            if api_url:
+                client = app_class(api_key=api_key, api_url=api_url)
+            else:
+                client = app_class(api_key=api_key)
+            _clients[key] = client
+        return client
+
+
+def clear_firecrawl_clients() -> None:
+    """清空客户端缓存（如更换 API Key 后）"""
+    with _clients_lock:
+        _clients.clear()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=FIRECRAWL_MAX_WORKERS,
+                thread_name_prefix='firecrawl-reader'
+            )
+        return _executor
+
+
+def _abandon(executor: ThreadPoolExecutor, future) -> None:
+    """
+    记录一个超时后仍在运行的调用
+    
+    正在运行的调用无法取消，会一直占用工作线程；此类调用过多时换用新的线程池，
+    旧线程池中的调用结束后其线程自行退出。
+    """
+    global _executor, _abandoned
+    
+    def finished(_):
+        global _abandoned
+        with _executor_lock:
+            if _executor is executor:
+                _abandoned -= 1
+    
+    with _executor_lock:
+        if _executor is not executor:
+            return
+        _abandoned += 1
+        if _abandoned >= FIRECRAWL_MAX_ABANDONED:
+            _executor, _abandoned = None, 0
+            executor.shutdown(wait=False)
+    future.add_done_callback(finished)
+
+
+def _call_with_timeout(func, timeout: float, *args, **kwargs):
+    """
+    在工作线程中执行阻塞调用，超过 timeout 秒抛出 TimeoutError
+    
+    超时后调用方立即返回；底层请求由 Firecrawl 服务端的超时参数终止，
+    未能及时结束的调用计入 _abandon()。
+    """
+    executor = _get_executor()
+    future = executor.submit(func, *args, **kwargs)
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        # 尚未开始的调用可以直接取消，已在运行的调用只能放弃等待
+        if not future.cancel():
+            _abandon(executor, future)
+        raise TimeoutError(f"请求超时（{timeout}秒）")
+
+
+def _resolve_api_key(api_key: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """检查 firecrawl 是否可用并确定 API Key，返回 (api_key, 错误信息)"""
+    # 检查 firecrawl 是否已安装
+    if _firecrawl_app_class() is None:
+        return None, "请先安装 firecrawl: pip install firecrawl-py"
+    
+    # 获取 API Key
+    if api_key is None:
+        api_key = os.environ.get('FIRECRAWL_API_KEY')
+    
+    if not api_key:
+        return None, "请设置 FIRECRAWL_API_KEY 环境变量或传入 api_key 参数"
+    
+    return api_key, None
+
+
+def _backend_throttle(error: Exception) -> Tuple[bool, Optional[float]]:
+    """判断异常是否为 Firecrawl 服务自身限流，返回 (是否限流, Retry-After 秒数)"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        message = str(error).lower()
+        throttled = '429' in message or 'rate limit' in message
+    else:
+        throttled = status == 429
+    if not throttled:
+        return False, None
+    headers = getattr(response, 'headers', None) or {}
+    return True, parse_retry_after(headers.get('Retry-After'))
+
+
+def _host_blocked(error: Optional[str]) -> bool:
+    """判断 _parse_document() 的错误是否表示目标站点拦截了抓取（403/429 状态码或验证页面）"""
+    if not error:
+        return False
+    return error.startswith(_VERIFICATION_ERROR) or error.endswith(_HOST_BLOCKED_ERROR)
+
+
+def _get_field(obj: Any, name: str, default: Any = None) -> Any:
+    """读取字段：Firecrawl v2 返回对象，v1 / 批量接口可能返回 dict"""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _parse_document(
+    result: Any,
+    url: str
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """校验 Firecrawl 返回的文档并转换为结果字典"""
+    # 处理 Firecrawl v2 的返回值
+    # 注意：v2 返回的是对象，不是 dict
+    markdown = _get_field(result, 'markdown', '') or ''
+    metadata = _get_field(result, 'metadata', {}) or {}
+    
+    # 目标站点返回 403/429 时内容是拦截页面，不作为成功结果返回
+    status = _get_field(metadata, 'statusCode') or _get_field(metadata, 'status_code')
+    if status in FIRECRAWL_HOST_THROTTLE_STATUSES:
+        return None, f"HTTP 错误 {status}: {_HOST_BLOCKED_ERROR}"
+    
+    # 从 metadata 获取标题
+    title = ''
+    if isinstance(metadata, dict):
+        title = metadata.get('title', '')
+    
+    # 如果没有从 metadata 获取到，尝试其他方式
+    if not title:
+        title = _get_field(result, 'title', '') or ''
+    
+    # 检查内容是否有效
+    if not markdown:
+        return None, "Firecrawl 返回的内容为空"
+    
+    # 检查内容长度（过滤掉验证页面、错误页面等）
+    if len(markdown) < 100:
+        return None, f"内容过短（{len(markdown)} 字符），可能是验证页面或错误页面"
+    
+    # 检查是否是常见的验证/错误页面
+    error_keywords = [
+        'captcha', '验证码', '请验证', 'security check',
+        'access denied', 'forbidden', 'blocked',
+        'please enable javascript', '需要启用 javascript'
+    ]
+    markdown_lower = markdown.lower()
+    for keyword in error_keywords:
+        if keyword in markdown_lower:
+            return None, f"{_VERIFICATION_ERROR}: {keyword}"
+    
+    return {
+        'title': title,
+        'markdown': markdown,
+        'metadata': metadata,
+        'url': url,
+        'length': len(markdown)
+    }, None
 
 
 def read_webpage_firecrawl(
     url: str,
     api_key: Optional[str] = None,
     formats: Optional[list] = None,
-    timeout: int = 60
+    timeout: int = 60,
+    api_url: Optional[str] = None
 ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
     使用 Firecrawl 抓取网页内容
@@ -27,7 +256,9 @@ def read_webpage_firecrawl(
         url: 目标网页 URL
         api_key: Firecrawl API Key，默认从环境变量 FIRECRAWL_API_KEY 读取
         formats: 返回格式列表，默认 ['markdown']
-        timeout: 请求超时时间（秒），默认 60 秒
+        timeout: 请求超时时间（秒），默认 60 秒；同时作为服务端抓取时限
+                 和本地等待时限
+        api_url: Firecrawl API 地址，默认从环境变量 FIRECRAWL_API_URL 读取
         
     Returns:
         Tuple[结果字典, 错误信息]
@@ -37,86 +268,208 @@ def read_webpage_firecrawl(
     if not url or not isinstance(url, str):
         return None, "URL 不能为空"
     
-    # 检查 firecrawl 是否已安装
-    if FirecrawlApp is None:
-        return None, "请先安装 firecrawl: pip install firecrawl-py"
-    
-    # 获取 API Key
-    if api_key is None:
-        api_key = os.environ.get('FIRECRAWL_API_KEY')
-    
-    if not api_key:
-        return None, "请设置 FIRECRAWL_API_KEY 环境变量或传入 api_key 参数"
+    api_key, error = _resolve_api_key(api_key)
+    if error:
+        return None, error
     
     # 设置默认格式
     if formats is None:
         formats = ['markdown']
     
+    # 按 Firecrawl 后端与目标主机限流，等待超过请求超时则直接放弃
     try:
-        # 初始化 Firecrawl
-        app = FirecrawlApp(api_key=api_key)
+        host = urlsplit(url).hostname
+    except ValueError as e:
+        return None, f"URL 格式错误: {e}"
+    limiter = get_rate_limiter()
+    if not limiter.acquire('firecrawl', host, timeout=timeout):
+        return None, rate_limited_error(timeout)
+    
+    try:
+        # 复用缓存的 Firecrawl 客户端
+        app = get_firecrawl_client(api_key, api_url)
         
-        # 调用 scrape 方法
+        # 调用 scrape 方法，服务端超时以毫秒计
         # Firecrawl v2 返回的是 Document 对象，不是 dict
-        result = app.scrape_url(url, params={'formats': formats})
-        
-        # 处理 Firecrawl v2 的返回值
-        # 注意：v2 返回的是对象，不是 dict，需要用 getattr
-        markdown = getattr(result, 'markdown', '') or ''
-        metadata = getattr(result, 'metadata', {}) or {}
-        
-        # 从 metadata 获取标题
-        title = ''
-        if isinstance(metadata, dict):
-            title = metadata.get('title', '')
-        
-        # 如果没有从 metadata 获取到，尝试其他方式
-        if not title and hasattr(result, 'title'):
-            title = getattr(result, 'title', '')
-        
-        # 检查内容是否有效
-        if not markdown:
-            return None, "Firecrawl 返回的内容为空"
-        
-        # 检查内容长度（过滤掉验证页面、错误页面等）
-        if len(markdown) < 100:
-            return None, f"内容过短（{len(markdown)} 字符），可能是验证页面或错误页面"
-        
-        # 检查是否是常见的验证/错误页面
-        error_keywords = [
-            'captcha', '验证码', '请验证', 'security check',
-            'access denied', 'forbidden', 'blocked',
-            'please enable javascript', '需要启用 javascript'
-        ]
-        markdown_lower = markdown.lower()
-        for keyword in error_keywords:
-            if keyword in markdown_lower:
-                return None, f"页面可能包含验证机制: {keyword}"
-        
-        return {
-            'title': title,
-            'markdown': markdown,
-            'metadata': metadata,
-            'url': url,
-            'length': len(markdown)
-        }, None
+        result = _call_with_timeout(
+            app.scrape_url, timeout,
+            url, params={'formats': formats, 'timeout': timeout * 1000}
+        )
         
+    except TimeoutError:
+        return None, f"Firecrawl 请求超时（{timeout}秒）"
     except Exception as e:
+        throttled, retry_after = _backend_throttle(e)
+        if throttled:
+            limiter.record_throttle(backend='firecrawl', retry_after=retry_after)
         return None, f"Firecrawl 错误: {str(e)}"
+    
+    document, error = _parse_document(result, url)
+    if _host_blocked(error):
+        limiter.record_throttle(host=host)
+    elif error is None:
+        limiter.record_success('firecrawl', host)
+    return document, error
 
 
 def read_webpage(
     url: str,
     api_key: Optional[str] = None,
     formats: Optional[list] = None,
-    timeout: int = 60
+    timeout: int = 60,
+    api_url: Optional[str] = None
 ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
     同步封装的 Firecrawl 网页读取函数（与 Jina/Playwright 接口保持一致）
     
     参数同 read_webpage_firecrawl()
     """
-    return read_webpage_firecrawl(url, api_key, formats, timeout)
+    return read_webpage_firecrawl(url, api_key, formats, timeout, api_url)
+
+
+def _normalize_source_url(url: str) -> str:
+    """用于批量结果回填的 URL 比较键（只有协议和主机名不区分大小写）"""
+    url = url.strip().rstrip('/')
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    return urlunsplit(parts._replace(
+        scheme=parts.scheme.lower(), netloc=parts.netloc.lower()
+    ))
+
+
+def read_webpages_firecrawl(
+    urls: List[str],
+    api_key: Optional[str] = None,
+    formats: Optional[list] = None,
+    timeout: int = 300,
+    api_url: Optional[str] = None,
+    poll_interval: float = 1.0,
+    max_poll_interval: float = 10.0
+) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    使用 Firecrawl 批量抓取接口一次提交多个网页
+    
+    提交一个批量任务后按指数退避轮询任务状态，完成后按来源 URL 回填结果，
+    每个页面使用与 read_webpage_firecrawl() 相同的校验规则。
+    
+    限流：提交前只按 Firecrawl 后端取一个令牌（整个任务只发出一次抓取请求，
+    页面由 Firecrawl 服务端调度抓取，提交前不按目标主机等待）；任务完成后按每个页面的结果
+    更新其目标主机的速率（成功加速、403/429 或验证页面降速），与单页读取共用学习到的速率。
+    
+    Args:
+        urls: 目标网页 URL 列表
+        api_key: Firecrawl API Key，默认从环境变量 FIRECRAWL_API_KEY 读取
+        formats: 返回格式列表，默认 ['markdown']
+        timeout: 整个批量任务的等待时限（秒），默认 300 秒
+        api_url: Firecrawl API 地址，默认从环境变量 FIRECRAWL_API_URL 读取
+        poll_interval: 首次轮询间隔（秒）
+        max_poll_interval: 轮询间隔上限（秒）
+        
+    Returns:
+        [(url, 结果字典, 错误信息), ...]，顺序与输入一致
+    """
+    urls = [u for u in urls if u and isinstance(u, str)]
+    if not urls:
+        return []
+    
+    def fail_all(error: str):
+        return [(u, None, error) for u in urls]
+    
+    api_key, error = _resolve_api_key(api_key)
+    if error:
+        return fail_all(error)
+    
+    if formats is None:
+        formats = ['markdown']
+    
+    unique_urls = list(dict.fromkeys(urls))
+    deadline = time.monotonic() + timeout
+    
+    # 批量任务只提交一次请求，提交前仅按 Firecrawl 后端限流
+    limiter = get_rate_limiter()
+    if not limiter.acquire('firecrawl', None, timeout=timeout):
+        return fail_all(rate_limited_error(timeout))
+    
+    try:
+        app = get_firecrawl_client(api_key, api_url)
+        
+        # 提交批量任务
+        job = _call_with_timeout(
+            app.async_batch_scrape_urls, timeout,
+            unique_urls, params={'formats': formats}
+        )
+        if _get_field(job, 'success') is False:
+            return fail_all(f"Firecrawl 批量任务提交失败: {_get_field(job, 'error', '')}")
+        job_id = _get_field(job, 'id')
+        if not job_id:
+            return fail_all("Firecrawl 批量任务未返回任务 ID")
+        
+        # 指数退避轮询任务状态
+        interval = poll_interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return fail_all(f"Firecrawl 批量任务超时（{timeout}秒）")
+            status = _call_with_timeout(app.check_batch_scrape_status, remaining, job_id)
+            state = _get_field(status, 'status', '')
+            if state == 'completed':
+                break
+            if state in ('failed', 'cancelled'):
+                return fail_all(f"Firecrawl 批量任务失败: {state}")
+            time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+            interval = min(interval * 1.5, max_poll_interval)
+        
+    except TimeoutError:
+        return fail_all(f"Firecrawl 批量任务超时（{timeout}秒）")
+    except Exception as e:
+        throttled, retry_after = _backend_throttle(e)
+        if throttled:
+            limiter.record_throttle(backend='firecrawl', retry_after=retry_after)
+        return fail_all(f"Firecrawl 错误: {str(e)}")
+    
+    # 按来源 URL 回填结果
+    documents: Dict[str, Any] = {}
+    for doc in _get_field(status, 'data', []) or []:
+        metadata = _get_field(doc, 'metadata', {}) or {}
+        if not isinstance(metadata, dict):
+            metadata = vars(metadata) if hasattr(metadata, '__dict__') else {}
+        source = metadata.get('sourceURL') or metadata.get('source_url') or metadata.get('url')
+        if source:
+            documents[_normalize_source_url(source)] = doc
+    
+    # 任务成功完成：提高 Firecrawl 后端的速率
+    limiter.record_success('firecrawl', None)
+    
+    results = []
+    parsed: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]] = {}
+    for url in urls:
+        doc = documents.get(_normalize_source_url(url))
+        if doc is None:
+            results.append((url, None, "Firecrawl 批量任务未返回该页面"))
+            continue
+        if url not in parsed:
+            parsed[url] = _parse_document(doc, url)
+            _record_host_result(limiter, url, parsed[url][1])
+        result, error = parsed[url]
+        results.append((url, result, error))
+    
+    return results
+
+
+def _record_host_result(limiter: AdaptiveRateLimiter, url: str, error: Optional[str]) -> None:
+    """按批量任务中单个页面的结果更新目标主机的速率"""
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return
+    if not host:
+        return
+    if _host_blocked(error):
+        limiter.record_throttle(host=host)
+    elif error is None:
+        limiter.record_success(None, host)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+HTTP 持久连接池
+基于标准库 http.client，按主机复用 HTTP/1.1 keep-alive 连接，
+避免每次请求都重新进行 TCP + TLS 握手；遵守 HTTP(S)_PROXY / NO_PROXY 环境变量
+"""
+
+import base64
+import http.client
+import ssl
+import threading
+import time
+import urllib.request
+import zlib
+from collections import deque
+from typing import Optional, Dict, Any, Tuple, Deque
+from urllib.parse import urlsplit, urljoin, unquote
+
+# brotli 为可选依赖，未安装时只协商 gzip / deflate；
+# 旧版 brotli（< 1.1）无法限制单次解压的输出大小，不能防御解压炸弹，同样不使用
+try:
+    import brotli
+except ImportError:
+    brotli = None
+else:
+    if not hasattr(brotli.Decompressor, 'can_accept_more_data'):
+        brotli = None
+
+
+# 默认连接池配置，可通过 configure_http_pool() 修改
+HTTP_POOL_DEFAULTS: Dict[str, Any] = {
+    'max_per_host': 8,      # 每个主机保留的空闲连接数量上限
+    'idle_timeout': 60,     # 空闲连接最长保留时间（秒）
+}
+
+# 复用的旧连接被服务端关闭时会抛出的异常，此时换新连接重试一次
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+PoolKey = Tuple[str, str, int]
+
+# 代理: (代理主机, 代理端口, Proxy-Authorization 请求头或 None)
+Proxy = Tuple[str, int, Optional[str]]
+
+
+def accept_encoding() -> str:
+    """返回本机支持的 Accept-Encoding 请求头取值"""
+    return 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+
+
+class StreamDecoder:
+    """
+    按 Content-Encoding 流式解压响应体
+
+    支持 identity / gzip / deflate（zlib 封装或裸 deflate）/ br（需安装 brotli >= 1.1）。
+    """
+
+    def __init__(self, content_encoding: Optional[str]):
+        encoding = (content_encoding or 'identity').strip().lower()
+        self.encoding = encoding
+        self._raw_deflate_fallback = False
+        # brotli 没有 unconsumed_tail，自行记录是否可能还有未输出的数据
+        self._br_pending = False
+
+        if encoding in ('identity', ''):
+            self._decoder = None
+        elif encoding in ('gzip', 'x-gzip'):
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self._decoder = zlib.decompressobj(zlib.MAX_WBITS)
+            self._raw_deflate_fallback = True
+        elif encoding == 'br' and brotli is not None:
+            self._decoder = brotli.Decompressor()
+        else:
+            raise ValueError(f"不支持的 Content-Encoding: {encoding}")
+
+    def decompress(self, data: bytes, max_length: int = 0) -> bytes:
+        """
+        解压一块数据
+
+        max_length > 0 时单次输出最多约 max_length 字节（brotli 单次至少输出约 32KB），
+        超出部分留在内部缓冲区，用 decompress_pending() 继续取出，可用于防御解压炸弹。
+        """
+        if self._decoder is None:
+            return data
+        if self.encoding == 'br':
+            return self._process_br(data, max_length)
+        try:
+            out = self._decoder.decompress(data, max_length)
+        except zlib.error:
+            # 部分服务端的 deflate 是不带 zlib 头的裸数据
+            if not self._raw_deflate_fallback:
+                raise
+            self._raw_deflate_fallback = False
+            self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            out = self._decoder.decompress(data, max_length)
+        self._raw_deflate_fallback = False
+        return out
+
+    def decompress_pending(self, max_length: int) -> bytes:
+        """继续输出因 max_length 限制而留在缓冲区的数据（has_pending_output 为真时调用）"""
+        if self._decoder is None:
+            return b''
+        if self.encoding == 'br':
+            return self._process_br(b'', max_length)
+        return self._decoder.decompress(self._decoder.unconsumed_tail, max_length)
+
+    def _process_br(self, data: bytes, max_length: int) -> bytes:
+        if max_length <= 0:
+            self._br_pending = False
+            return self._decoder.process(data)
+        out = self._decoder.process(data, output_buffer_limit=max_length)
+        # 输出达到上限时缓冲区里可能还有数据（can_accept_more_data 不能可靠反映这一点）
+        self._br_pending = len(out) >= max_length or not self._decoder.can_accept_more_data()
+        return out
+
+    @property
+    def has_pending_output(self) -> bool:
+        """是否还有因 max_length 限制而未输出的数据"""
+        if self._decoder is None:
+            return False
+        if self.encoding == 'br':
+            return self._br_pending
+        return bool(self._decoder.unconsumed_tail)
+
+    def flush(self) -> bytes:
+        if self._decoder is None or self.encoding == 'br':
+            return b''
+        return self._decoder.flush()
+
+
+class PooledResponse:
+    """
+    连接池返回的响应
+
+    读取完毕或调用 close() 后，可复用的连接自动归还连接池。
+    """
+
+    def __init__(self, pool: 'HTTPConnectionPool', key: PoolKey,
+                 conn: http.client.HTTPConnection, response: http.client.HTTPResponse,
+                 url: str):
+        self._pool = pool
+        self._key = key
+        self._conn: Optional[http.client.HTTPConnection] = conn
+        self._response = response
+        self.url = url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """读取响应体（amt 为 None 时读取全部）"""
+        data = self._response.read(amt)
+        if amt is None or not data:
+            self._release()
+        return data
+
+    def close(self) -> None:
+        """结束响应；未读完的连接不再复用"""
+        if self._conn is None:
+            return
+        if not self._response.isclosed():
+            self._conn.close()
+            self._conn = None
+            return
+        self._release()
+
+    def _release(self) -> None:
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool._put(self._key, conn)
+        else:
+            conn.close()
+
+    def __enter__(self) -> 'PooledResponse':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class HTTPConnectionPool:
+    """
+    线程安全的 HTTP/1.1 持久连接池
+
+    - 按 (scheme, host, port) 分组保留空闲连接，每组最多 max_per_host 个
+    - 超过 idle_timeout 未使用的连接在取用时丢弃
+    - 复用的连接被服务端关闭时自动换新连接重试一次
+    - 按 urllib 的规则使用代理：http 请求经代理转发，https 请求通过 CONNECT 隧道
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 8,
+        idle_timeout: float = 60,
+        proxies: Optional[Dict[str, str]] = None
+    ):
+        self.max_per_host = max(1, max_per_host)
+        self.idle_timeout = idle_timeout
+        # 默认读取 HTTP(S)_PROXY / NO_PROXY 等环境变量（与 urllib 一致）
+        self.proxies = urllib.request.getproxies() if proxies is None else dict(proxies)
+        self._idle: Dict[PoolKey, Deque[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+        self.connections_created = 0
+
+    def _proxy_for(self, scheme: str, host: str) -> Optional[Proxy]:
+        """返回访问该主机应使用的代理，不使用代理时返回 None"""
+        proxy_url = self.proxies.get(scheme)
+        if not proxy_url or urllib.request.proxy_bypass_environment(host, self.proxies):
+            return None
+        if '://' not in proxy_url:
+            proxy_url = 'http://' + proxy_url
+        parts = urlsplit(proxy_url)
+        if not parts.hostname:
+            return None
+        auth = None
+        if parts.username is not None:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            auth = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+        return parts.hostname, parts.port or 8080, auth
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        timeout: float = 30,
+        max_redirects: int = 5
+    ) -> PooledResponse:
+        """
+        发送请求并返回响应（响应体需由调用方读取或关闭）
+
+        Raises:
+            OSError / http.client.HTTPException: 网络或协议错误
+            socket.timeout: 请求超时
+        """
+        for _ in range(max_redirects + 1):
+            response = self._request_once(method, url, headers, body, timeout)
+            location = response.headers.get('Location')
+            if response.status not in _REDIRECT_STATUSES or not location or max_redirects <= 0:
+                return response
+            response.read()
+            url = urljoin(url, location)
+            if response.status == 303:
+                method, body = 'GET', None
+        return response
+
+    def _request_once(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        body: Optional[bytes],
+        timeout: float
+    ) -> PooledResponse:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"不支持的 URL: {url}")
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key: PoolKey = (scheme, parts.hostname.lower(), port)
+
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+
+        request_headers = {'Connection': 'keep-alive'}
+        request_headers.update(headers or {})
+
+        # http 经代理转发时请求行使用完整 URL
+        proxy = self._proxy_for(scheme, key[1]) if scheme == 'http' else None
+        if proxy is not None:
+            target = f"http://{parts.netloc.rpartition('@')[2]}{target}"
+            if proxy[2]:
+                request_headers['Proxy-Authorization'] = proxy[2]
+
+        while True:
+            conn, reused = self._get(key, timeout)
+            try:
+                conn.request(method, target, body=body, headers=request_headers)
+                response = conn.getresponse()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            return PooledResponse(self, key, conn, response, url)
+
+    def _get(self, key: PoolKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """取出空闲连接，没有时新建；返回 (连接, 是否复用)"""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used <= self.idle_timeout and conn.sock is not None:
+                    conn.timeout = timeout
+                    conn.sock.settimeout(timeout)
+                    return conn, True
+                conn.close()
+
+        scheme, host, port = key
+        proxy = self._proxy_for(scheme, host)
+        if scheme == 'https':
+            if proxy is None:
+                conn = http.client.HTTPSConnection(
+                    host, port, timeout=timeout, context=self._ssl_context
+                )
+            else:
+                # 通过 CONNECT 隧道访问，TLS 握手仍与目标主机进行
+                proxy_host, proxy_port, auth = proxy
+                conn = http.client.HTTPSConnection(
+                    proxy_host, proxy_port, timeout=timeout, context=self._ssl_context
+                )
+                conn.set_tunnel(host, port, headers={'Proxy-Authorization': auth} if auth else None)
+        elif proxy is None:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        else:
+            conn = http.client.HTTPConnection(proxy[0], proxy[1], timeout=timeout)
+        with self._lock:
+            self.connections_created += 1
+        return conn, False
+
+    def _put(self, key: PoolKey, conn: http.client.HTTPConnection) -> None:
+        if conn.sock is None:
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.max_per_host:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """关闭所有空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回连接池当前状态"""
+        with self._lock:
+            return {
+                'hosts': len(self._idle),
+                'idle_connections': sum(len(v) for v in self._idle.values()),
+                'connections_created': self.connections_created,
+            }
+
+
+_default_pool: Optional[HTTPConnectionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def configure_http_pool(**options: Any) -> None:
+    """
+    修改默认连接池配置（会关闭并替换当前默认池）
+
+    可选键: max_per_host, idle_timeout
+    """
+    global _default_pool
+    unknown = set(options) - set(HTTP_POOL_DEFAULTS)
+    if unknown:
+        raise ValueError(f"未知的连接池配置: {', '.join(sorted(unknown))}")
+    HTTP_POOL_DEFAULTS.update(options)
+    with _default_pool_lock:
+        pool, _default_pool = _default_pool, None
+    if pool is not None:
+        pool.close()
+
+
+def get_http_pool() -> HTTPConnectionPool:
+    """获取进程内共享的默认连接池"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = HTTPConnectionPool(**HTTP_POOL_DEFAULTS)
+        return _default_pool
@@ -4,29 +4,219 @@ Jina Reader 网页内容提取工具
 使用 https://r.jina.ai/ 服务免费提取网页内容
 """
 
-import urllib.request
-import urllib.error
-from typing import Optional, Tuple
+import asyncio
+import codecs
+import functools
+import http.client
+import os
+import socket
+import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, List, Iterable, Dict, Any
+from urllib.parse import urlsplit
+
+# 添加上级目录到路径，以便导入其他模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_reader.http_pool import get_http_pool, accept_encoding, StreamDecoder
+from web_reader.rate_limiter import get_rate_limiter, parse_retry_after, rate_limited_error
 
 
 JINA_READER_BASE = "https://r.jina.ai/"
 
+# 异步接口使用的工作线程数量（固定，不随 concurrency 增长；请求本身经由共享连接池发出）。
+# 也是 read_many 的实际并发上限，Jina 后端另受自适应限流约束，更多线程并不能提高吞吐
+JINA_ASYNC_MAX_WORKERS = 32
+
+# 响应体大小上限（字节），超过即放弃读取
+JINA_MAX_CONTENT_BYTES = 20 * 1024 * 1024
+
+# 流式读取的块大小（字节）
+JINA_READ_CHUNK_SIZE = 64 * 1024
+
+# 在正文开头出现即判定为验证/拦截页面的标记
+JINA_VERIFICATION_MARKERS = (
+    '环境异常',
+    '完成验证后即可继续访问',
+    '请完成安全验证',
+    'Verify you are human',
+    'Just a moment...',
+)
+
+# 错误/验证页检测只看开头这么多字符
+_HEAD_CHECK_CHARS = 200
+
+# 开头检查之前单次最多解压的字节数（UTF-8 每字符最多 4 字节），
+# 压缩的错误/验证页不会在检查前被整块解压
+_HEAD_CHECK_BYTES = _HEAD_CHECK_CHARS * 4
+
+_VERIFICATION_ERROR = "页面可能包含验证机制"
+
+# Jina 自身限流的状态码（降低 Jina 后端的速率）
+JINA_BACKEND_THROTTLE_STATUSES = (429, 503)
+
+# 目标站点拦截的状态码（降低目标主机的速率）
+JINA_HOST_THROTTLE_STATUSES = (403, 451)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _check_head(head: str) -> Optional[str]:
+    """检查正文开头是否为错误或验证页面，是则返回错误信息"""
+    if head.startswith('Failed to fetch') or 'Error:' in head[:100]:
+        return f"Jina Reader 无法提取该页面: {head[:200]}"
+    for marker in JINA_VERIFICATION_MARKERS:
+        if marker in head:
+            return f"{_VERIFICATION_ERROR}: {marker}"
+    return None
+
 
-def read_webpage(url: str, timeout: int = 30) -> Tuple[Optional[str], Optional[str]]:
+def _read_body(
+    response,
+    max_bytes: int
+) -> Tuple[Optional[str], Optional[str], Dict[str, Any]]:
     """
-    使用 Jina Reader 读取网页内容
+    流式读取响应体
     
-    Args:
-        url: 目标网页 URL
-        timeout: 请求超时时间（秒），默认 30 秒
+    按 Content-Encoding 流式解压，再用增量 UTF-8 解码器逐块解码。
+    每次解压的输出有上限（开头检查前 _HEAD_CHECK_BYTES，之后 JINA_READ_CHUNK_SIZE），
+    解码后超过 max_bytes 或开头即为错误/验证页面时立即停止读取
+    （未读完的连接不会被复用）。
+    
+    Returns:
+        (内容, 错误信息, 传输统计 {content_encoding, wire_bytes, decoded_bytes})
+    """
+    stats: Dict[str, Any] = {
+        'content_encoding': response.headers.get('Content-Encoding') or 'identity',
+        'wire_bytes': 0,
+        'decoded_bytes': 0,
+    }
+    
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        return None, f"内容过大（{content_length} 字节，上限 {max_bytes} 字节）", stats
+    
+    try:
+        decompressor = StreamDecoder(stats['content_encoding'])
+    except ValueError as e:
+        return None, str(e), stats
+    
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    parts = []
+    head_checked = False
+    head = ''
+    too_large = f"内容过大（超过 {max_bytes} 字节）"
+    
+    def window() -> int:
+        # 多解压 1 字节即可判断是否超过上限，避免解压炸弹占满内存
+        limit = JINA_READ_CHUNK_SIZE if head_checked else _HEAD_CHECK_BYTES
+        return min(limit, max_bytes - stats['decoded_bytes'] + 1)
+    
+    while True:
+        chunk = response.read(JINA_READ_CHUNK_SIZE)
+        if chunk:
+            stats['wire_bytes'] += len(chunk)
+            data = decompressor.decompress(chunk, window())
+        else:
+            data = decompressor.flush()
         
+        # 一块压缩数据可能解压出很多输出，按窗口逐段取出
+        while True:
+            stats['decoded_bytes'] += len(data)
+            if stats['decoded_bytes'] > max_bytes:
+                return None, too_large, stats
+            
+            text = decoder.decode(data, final=not chunk)
+            parts.append(text)
+            
+            # 收到足够的开头内容后立即检查错误/验证页面
+            if not head_checked:
+                head += text
+                if len(head) >= _HEAD_CHECK_CHARS:
+                    head_checked = True
+                    error = _check_head(head)
+                    if error:
+                        return None, error, stats
+            
+            if not chunk or not decompressor.has_pending_output:
+                break
+            data = decompressor.decompress_pending(window())
+        
+        if not chunk:
+            break
+    
+    content = ''.join(parts)
+    
+    # 检查内容是否有效
+    if not content or not content.strip():
+        return None, "返回内容为空", stats
+    
+    # 短内容在读取结束后检查
+    if not head_checked:
+        error = _check_head(content)
+        if error:
+            return None, error, stats
+    
+    return content, None, stats
+
+
+def _request(
+    jina_url: str,
+    headers: Dict[str, str],
+    timeout: int,
+    max_bytes: int
+) -> Tuple[Optional[str], Optional[str], Dict[str, Any], Optional[Tuple[str, Optional[float]]]]:
+    """
+    发送请求并读取正文
+
     Returns:
-        Tuple[内容, 错误信息]
-        - 成功时返回 (markdown_content, None)
-        - 失败时返回 (None, error_message)
+        (内容, 错误信息, 传输统计, 限流信号)；限流信号为 ('backend' 或 'host', Retry-After 秒数)
     """
+    stats: Dict[str, Any] = {}
+    try:
+        # 通过共享连接池发送请求，复用到 r.jina.ai 的 keep-alive 连接
+        with get_http_pool().request('GET', jina_url, headers=headers, timeout=timeout) as response:
+            # 检查 HTTP 状态码
+            if response.status != 200:
+                error = f"HTTP 错误 {response.status}: {response.reason}"
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if response.status in JINA_BACKEND_THROTTLE_STATUSES:
+                    return None, error, stats, ('backend', retry_after)
+                if response.status in JINA_HOST_THROTTLE_STATUSES:
+                    return None, error, stats, ('host', retry_after)
+                return None, error, stats, None
+            
+            # 流式读取内容，并尽早识别错误/验证页面
+            content, error, stats = _read_body(response, max_bytes)
+            if error and error.startswith(_VERIFICATION_ERROR):
+                return content, error, stats, ('host', None)
+            return content, error, stats, None
+            
+    except UnicodeDecodeError:
+        return None, "返回内容不是有效的 UTF-8 文本", stats, None
+    except zlib.error as e:
+        return None, f"解压响应失败: {e}", stats, None
+    except (socket.timeout, TimeoutError):
+        return None, f"请求超时（{timeout}秒）", stats, None
+    except (OSError, http.client.HTTPException) as e:
+        return None, f"URL 错误: {e}", stats, None
+    except Exception as e:
+        return None, f"未知错误: {str(e)}", stats, None
+
+
+def _fetch(
+    url: str,
+    timeout: int,
+    max_bytes: int
+) -> Tuple[Optional[str], Optional[str], Dict[str, Any]]:
+    """请求 Jina Reader（经过自适应限流），返回 (内容, 错误信息, 传输统计)"""
+    stats: Dict[str, Any] = {}
+    
     if not url or not isinstance(url, str):
-        return None, "URL 不能为空"
+        return None, "URL 不能为空", stats
     
     # 构建 Jina Reader URL
     jina_url = JINA_READER_BASE + url
@@ -34,47 +224,67 @@ def read_webpage(url: str, timeout: int = 30) -> Tuple[Optional[str], Optional[s
     # 设置请求头
     headers = {
         'Accept': 'text/markdown',
+        'Accept-Encoding': accept_encoding(),
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
     }
     
+    # 按 Jina 后端与目标主机限流，等待超过请求超时则直接放弃
     try:
-        request = urllib.request.Request(jina_url, headers=headers)
+        host = urlsplit(url).hostname
+    except ValueError as e:
+        return None, f"URL 格式错误: {e}", stats
+    limiter = get_rate_limiter()
+    if not limiter.acquire('jina', host, timeout=timeout):
+        return None, rate_limited_error(timeout), stats
+    
+    content, error, stats, throttle = _request(jina_url, headers, timeout, max_bytes)
+    
+    if throttle is not None:
+        scope, retry_after = throttle
+        if scope == 'backend':
+            limiter.record_throttle(backend='jina', retry_after=retry_after)
+        else:
+            limiter.record_throttle(host=host, retry_after=retry_after)
+    elif error is None:
+        limiter.record_success('jina', host)
+    
+    return content, error, stats
+
+
+def read_webpage(
+    url: str,
+    timeout: int = 30,
+    max_bytes: int = JINA_MAX_CONTENT_BYTES
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    使用 Jina Reader 读取网页内容
+    
+    Args:
+        url: 目标网页 URL
+        timeout: 请求超时时间（秒），默认 30 秒
+        max_bytes: 响应体大小上限（字节），默认 20MB
         
-        with urllib.request.urlopen(request, timeout=timeout) as response:
-            # 检查 HTTP 状态码
-            if response.status != 200:
-                return None, f"HTTP 错误: {response.status}"
-            
-            # 读取内容
-            content = response.read().decode('utf-8')
-            
-            # 检查内容是否有效
-            if not content or not content.strip():
-                return None, "返回内容为空"
-            
-            # 检查是否返回了错误信息
-            if content.startswith('Failed to fetch') or 'Error:' in content[:100]:
-                return None, f"Jina Reader 无法提取该页面: {content[:200]}"
-            
-            return content, None
-            
-    except urllib.error.HTTPError as e:
-        return None, f"HTTP 错误 {e.code}: {e.reason}"
-    except urllib.error.URLError as e:
-        return None, f"URL 错误: {e.reason}"
-    except TimeoutError:
-        return None, f"请求超时（{timeout}秒）"
-    except Exception as e:
-        return None, f"未知错误: {str(e)}"
+    Returns:
+        Tuple[内容, 错误信息]
+        - 成功时返回 (markdown_content, None)
+        - 失败时返回 (None, error_message)
+    """
+    content, error, _ = _fetch(url, timeout, max_bytes)
+    return content, error
 
 
-def read_webpage_with_meta(url: str, timeout: int = 30) -> dict:
+def read_webpage_with_meta(
+    url: str,
+    timeout: int = 30,
+    max_bytes: int = JINA_MAX_CONTENT_BYTES
+) -> dict:
     """
     读取网页并返回详细信息
     
     Args:
         url: 目标网页 URL
         timeout: 请求超时时间（秒）
+        max_bytes: 响应体大小上限（字节）
         
     Returns:
         dict 包含:
@@ -83,16 +293,141 @@ def read_webpage_with_meta(url: str, timeout: int = 30) -> dict:
         - error: 错误信息（失败时）
         - url: 原始 URL
         - jina_url: 使用的 Jina Reader URL
+        - content_encoding: 响应的压缩编码
+        - wire_bytes: 实际传输的字节数
+        - decoded_bytes: 解压后的字节数
     """
-    content, error = read_webpage(url, timeout)
-    
-    return {
+    content, error, stats = _fetch(url, timeout, max_bytes)
+    return _meta_result(url, content, error, stats)
+
+
+def _meta_result(
+    url: str,
+    content: Optional[str],
+    error: Optional[str],
+    stats: Dict[str, Any]
+) -> dict:
+    """组装 read_webpage_with_meta() 的返回值（未收到响应体时传输统计为空值）"""
+    result = {
         'success': error is None,
         'content': content,
         'error': error,
         'url': url,
-        'jina_url': JINA_READER_BASE + url
+        'jina_url': JINA_READER_BASE + url,
+        'content_encoding': None,
+        'wire_bytes': 0,
+        'decoded_bytes': 0,
     }
+    result.update(stats)
+    return result
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """获取异步接口共用的线程池（JINA_ASYNC_MAX_WORKERS 个线程）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=JINA_ASYNC_MAX_WORKERS,
+                thread_name_prefix='jina-reader'
+            )
+        return _executor
+
+
+async def read_webpage_async(
+    url: str,
+    timeout: int = 30,
+    max_bytes: int = JINA_MAX_CONTENT_BYTES
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    read_webpage() 的异步版本
+    
+    基于线程实现：阻塞的请求在共用线程池（JINA_ASYNC_MAX_WORKERS 个线程）中
+    通过共享连接池发出，不阻塞事件循环；timeout 为整个请求（含读取正文）的时限。
+    
+    Returns:
+        Tuple[内容, 错误信息]，同 read_webpage()
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(
+                _get_executor(),
+                functools.partial(read_webpage, url, timeout, max_bytes)
+            ),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        return None, f"请求超时（{timeout}秒）"
+
+
+async def read_webpage_with_meta_async(
+    url: str,
+    timeout: int = 30,
+    max_bytes: int = JINA_MAX_CONTENT_BYTES
+) -> dict:
+    """
+    read_webpage_with_meta() 的异步版本（基于线程，同 read_webpage_async()）
+    
+    Returns:
+        dict，字段同 read_webpage_with_meta()
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        result = await asyncio.wait_for(
+            loop.run_in_executor(
+                _get_executor(),
+                functools.partial(read_webpage_with_meta, url, timeout, max_bytes)
+            ),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        result = _meta_result(url, None, f"请求超时（{timeout}秒）", {})
+    return result
+
+
+async def read_many(
+    urls: Iterable[str],
+    concurrency: int = 8,
+    timeout: int = 30,
+    max_bytes: int = JINA_MAX_CONTENT_BYTES
+) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    并发读取多个网页
+    
+    Args:
+        urls: 目标网页 URL 列表
+        concurrency: 同时进行的请求数量上限，默认 8；
+            基于线程实现，超过 JINA_ASYNC_MAX_WORKERS 时按该值计
+        timeout: 单个请求的超时时间（秒）
+        max_bytes: 单个响应体大小上限（字节）
+        
+    Returns:
+        [(url, 内容, 错误信息), ...]，顺序与输入一致
+    
+    超时的请求立即返回错误，但其工作线程仍在等待底层连接超时；
+    该线程结束前继续占用并发名额，因此同时运行的线程数不会超过 concurrency。
+    """
+    # 线程数固定，不随 concurrency 增长
+    concurrency = max(1, min(concurrency, JINA_ASYNC_MAX_WORKERS))
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = _get_executor()
+    loop = asyncio.get_running_loop()
+    
+    async def read_one(url: str):
+        await semaphore.acquire()
+        future = loop.run_in_executor(
+            executor, functools.partial(read_webpage, url, timeout, max_bytes)
+        )
+        # 线程真正结束时才释放名额
+        future.add_done_callback(lambda _: semaphore.release())
+        try:
+            content, error = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            content, error = None, f"请求超时（{timeout}秒）"
+        return url, content, error
+    
+    return list(await asyncio.gather(*(read_one(url) for url in urls)))
 
 
 if __name__ == '__main__':
@@ -5,8 +5,25 @@ Playwright 网页内容提取工具
 """
 
 import asyncio
-from typing import Optional, Tuple, Dict, Any
+import itertools
+import os
+import sys
+from typing import Optional, Tuple, Dict, Any, Union, FrozenSet, Iterable, AsyncIterator, Set
+from urllib.parse import urlparse
 from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# 添加上级目录到路径，以便导入其他模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_reader.browser_pool import get_browser_pool, close_browser_pool
+from web_reader.event_loop import run_sync, register_shutdown_hook
+from web_reader.jina_reader import JINA_VERIFICATION_MARKERS
+from web_reader.rate_limiter import get_rate_limiter, parse_retry_after, rate_limited_error
+
+
+# 后台事件循环关闭前关闭其浏览器池
+register_shutdown_hook(close_browser_pool)
 
 
 # 微信内置浏览器的 User-Agent
@@ -16,12 +33,333 @@ WECHAT_USER_AGENT = (
     "MicroMessenger/8.0.38(0x18002628) NetType/WIFI Language/zh_CN"
 )
 
+# 默认拦截的资源类型（正文提取只需要文档、脚本和样式）
+DEFAULT_BLOCKED_RESOURCE_TYPES = frozenset({
+    'image', 'media', 'font', 'texttrack', 'manifest',
+})
+
+# 默认拦截的主机（统计、广告、埋点），匹配该域名及其子域名
+DEFAULT_BLOCKED_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'hm.baidu.com',
+    'cnzz.com',
+    'umeng.com',
+    'growingio.com',
+    'sensorsdata.cn',
+)
+
+# 平台预设：在默认规则之上追加拦截的资源类型和主机
+RESOURCE_BLOCK_PRESETS = {
+    '微信公众号': {
+        'resource_types': [],
+        'hosts': ['badjs.weixinbridge.com', 'mmbiz.qpic.cn', 'mpvideo.qpic.cn'],
+    },
+    '知乎': {
+        'resource_types': [],
+        'hosts': ['zhihu-web-analytics.zhihu.com'],
+    },
+    '小红书': {
+        'resource_types': [],
+        'hosts': ['t2.xiaohongshu.com', 'apm-fe.xiaohongshu.com', 'xhscdn.com'],
+    },
+    '抖音': {
+        'resource_types': ['websocket'],
+        'hosts': ['mcs.zijieapi.com', 'mon.zijieapi.com', 'douyinvod.com'],
+    },
+    '淘宝': {
+        'resource_types': [],
+        'hosts': ['mmstat.com', 'arms-retcode.aliyuncs.com'],
+    },
+}
+
+# block_resources 参数类型：
+# - True: 默认规则
+# - 平台名称（如 '知乎'）: 默认规则 + 平台预设
+# - dict: {'resource_types': [...], 'hosts': [...]} 完全自定义
+# - False / None: 不拦截
+BlockRules = Union[bool, str, Dict[str, Any], None]
+
+# 平台正文选择器：正文节点出现且文本长度稳定即视为页面就绪
+PLATFORM_CONTENT_SELECTORS = {
+    '微信公众号': '.rich_media_content',
+    '知乎': '.Post-RichTextContainer, .RichContent-inner',
+    '小红书': '.note-content',
+    '抖音': '[data-e2e="video-desc"], .video-info-detail',
+    '淘宝': '.tb-detail-hd, [class*="ItemHeader"]',
+    '京东': '.sku-name',
+    'B站': '.video-title, .article-holder',
+}
+
+# 未指定平台时使用的通用正文选择器
+GENERIC_CONTENT_SELECTOR = (
+    'article, [role="main"], .post-content, .article-content, .entry-content, '
+    '.rich_media_content, .Post-RichTextContainer, .note-content'
+)
+
+# 页面就绪模式：
+# - 'content': DOMContentLoaded 后等待正文节点出现并且文本长度稳定（默认）
+# - 'networkidle' / 'load' / 'domcontentloaded': 直接使用 Playwright 的等待条件
+READINESS_MODES = ('content', 'networkidle', 'load', 'domcontentloaded')
+
+# 正文长度稳定检测：轮询间隔（秒）与连续不变次数
+CONTENT_POLL_INTERVAL = 0.25
+CONTENT_STABLE_CHECKS = 2
+
+# 未指定正文选择器时，等待通用选择器的最长时间（秒）；
+# 多数页面没有通用正文节点，超时后改为等待 load 事件并检测 body 文本稳定
+GENERIC_CONTENT_WAIT = 3.0
+
+# 导航响应为这些状态码时视为目标站点限流/拦截
+PLAYWRIGHT_THROTTLE_STATUSES = (403, 429)
+
+_CONTENT_LENGTH_JS = """(selector) => {
+    const element = document.querySelector(selector);
+    return element ? element.innerText.length : -1;
+}"""
+
+
+# 页面内容提取脚本：提取标题、正文与元数据
+EXTRACT_PAGE_JS = """() => {
+    // 提取标题
+    const title = document.title || '';
+    
+    // 尝试提取正文内容
+    // 策略：优先查找文章主体区域
+    const articleSelectors = [
+        'article',
+        '[role="main"]',
+        '.post-content',
+        '.article-content',
+        '.entry-content',
+        '.content',
+        '#content',
+        '.rich_media_content',  // 微信公众号
+        '.Post-RichTextContainer',  // 知乎
+        '.note-content',  // 小红书
+    ];
+    
+    let content = '';
+    
+    for (const selector of articleSelectors) {
+        const element = document.querySelector(selector);
+        if (element) {
+            content = element.innerText;
+            break;
+        }
+    }
+    
+    // 如果没找到，提取 body 文本
+    if (!content) {
+        const body = document.body;
+        if (body) {
+            // 过滤脚本和样式标签
+            const scripts = body.querySelectorAll('script, style, nav, header, footer, aside');
+            scripts.forEach(el => el.remove());
+            content = body.innerText;
+        }
+    }
+    
+    // 提取元数据
+    const description = document.querySelector('meta[name="description"]')?.content || '';
+    const ogTitle = document.querySelector('meta[property="og:title"]')?.content || '';
+    const ogDescription = document.querySelector('meta[property="og:description"]')?.content || '';
+    
+    return {
+        title: title,
+        ogTitle: ogTitle,
+        description: description,
+        ogDescription: ogDescription,
+        content: content.trim(),
+        url: window.location.href
+    };
+}"""
+
+
+def resolve_block_rules(
+    block_resources: BlockRules
+) -> Optional[Tuple[FrozenSet[str], Tuple[str, ...]]]:
+    """
+    解析资源拦截配置
+    
+    Returns:
+        (拦截的资源类型集合, 拦截的主机列表)，不拦截时返回 None
+    """
+    if not block_resources:
+        return None
+    
+    if isinstance(block_resources, dict):
+        types = frozenset(block_resources.get('resource_types') or ())
+        hosts = tuple(h.lower() for h in block_resources.get('hosts') or ())
+        return types, hosts
+    
+    types = set(DEFAULT_BLOCKED_RESOURCE_TYPES)
+    hosts = list(DEFAULT_BLOCKED_HOSTS)
+    
+    if isinstance(block_resources, str):
+        preset = RESOURCE_BLOCK_PRESETS.get(block_resources, {})
+        types.update(preset.get('resource_types', []))
+        hosts.extend(preset.get('hosts', []))
+    
+    return frozenset(types), tuple(h.lower() for h in hosts)
+
+
+def _host_blocked(request_url: str, hosts: Tuple[str, ...]) -> bool:
+    """判断请求主机是否命中拦截列表（含子域名）"""
+    if not hosts:
+        return False
+    try:
+        hostname = (urlparse(request_url).hostname or '').lower()
+    except ValueError:
+        return False
+    return any(hostname == h or hostname.endswith('.' + h) for h in hosts)
+
+
+async def _install_route_filter(
+    page: Page,
+    rules: Tuple[FrozenSet[str], Tuple[str, ...]]
+) -> None:
+    """在页面上安装请求拦截，只放行正文提取需要的资源"""
+    blocked_types, blocked_hosts = rules
+    
+    async def handle(route):
+        request = route.request
+        # 主文档始终放行
+        if request.resource_type != 'document' and (
+            request.resource_type in blocked_types
+            or _host_blocked(request.url, blocked_hosts)
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    await page.route('**/*', handle)
+
+
+async def _wait_until_stable(page: Page, selector: str, deadline: float) -> bool:
+    """轮询节点文本长度，连续不变即返回 True；到达 deadline（事件循环时间）返回 False"""
+    loop = asyncio.get_running_loop()
+    last_length = -1
+    stable = 0
+    while loop.time() < deadline:
+        length = await page.evaluate(_CONTENT_LENGTH_JS, selector)
+        if length > 0 and length == last_length:
+            stable += 1
+            if stable >= CONTENT_STABLE_CHECKS:
+                return True
+        else:
+            stable = 0
+        last_length = length
+        await asyncio.sleep(CONTENT_POLL_INTERVAL)
+    
+    return False
+
+
+async def _wait_for_content(page: Page, selector: str, timeout: float) -> bool:
+    """
+    等待正文节点出现且文本长度稳定
+    
+    Returns:
+        是否在超时前检测到稳定的正文；超时时返回 False，由调用方照常提取
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    
+    try:
+        await page.wait_for_selector(selector, state='attached', timeout=timeout * 1000)
+    except PlaywrightTimeoutError:
+        return False
+    
+    return await _wait_until_stable(page, selector, deadline)
+
+
+async def _wait_for_body(page: Page, timeout: float) -> bool:
+    """
+    通用选择器未命中时的兜底：等待 load 事件，再短暂检测 body 文本长度稳定
+    
+    Returns:
+        是否检测到稳定的正文
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    
+    try:
+        await page.wait_for_load_state('load', timeout=timeout * 1000)
+    except PlaywrightTimeoutError:
+        return False
+    
+    stable_deadline = min(deadline, loop.time() + GENERIC_CONTENT_WAIT)
+    return await _wait_until_stable(page, 'body', stable_deadline)
+
+
+async def _extract_page(
+    page: Page,
+    url: str,
+    timeout: int,
+    block_resources: BlockRules = True,
+    wait_until: str = 'content',
+    content_selector: Optional[str] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[int, Optional[float]]]]:
+    """访问页面并提取内容，返回 (提取结果, 限流信号)"""
+    if wait_until not in READINESS_MODES:
+        raise ValueError(f"未知的 wait_until: {wait_until}")
+    
+    # 设置默认超时
+    page.set_default_timeout(timeout * 1000)
+    
+    # 拦截图片、字体、统计脚本等与正文无关的请求
+    rules = resolve_block_rules(block_resources)
+    if rules:
+        await _install_route_filter(page, rules)
+    
+    # 访问目标页面
+    if wait_until == 'content':
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        response = await page.goto(url, wait_until='domcontentloaded')
+        if _throttle_signal(response) is None:
+            remaining = max(timeout - (loop.time() - started), 0.1)
+            if content_selector:
+                # 显式指定或平台选择器：等待到超时
+                await _wait_for_content(page, content_selector, remaining)
+            elif not await _wait_for_content(
+                page, GENERIC_CONTENT_SELECTOR, min(remaining, GENERIC_CONTENT_WAIT)
+            ):
+                remaining = max(timeout - (loop.time() - started), 0.1)
+                await _wait_for_body(page, remaining)
+    else:
+        response = await page.goto(url, wait_until=wait_until)
+    
+    # 使用 JS 提取标题和正文
+    return await page.evaluate(EXTRACT_PAGE_JS), _throttle_signal(response)
+
+
+def _throttle_signal(response) -> Optional[Tuple[int, Optional[float]]]:
+    """导航响应为限流/拦截状态码时返回 (状态码, Retry-After 秒数)"""
+    if response is None or response.status not in PLAYWRIGHT_THROTTLE_STATUSES:
+        return None
+    return response.status, parse_retry_after(response.headers.get('retry-after'))
+
+
+def _verification_marker(result: Dict[str, Any]) -> Optional[str]:
+    """标题或正文开头出现验证页面标记时返回该标记"""
+    head = (result.get('title') or '') + '\n' + (result.get('content') or '')[:200]
+    for marker in JINA_VERIFICATION_MARKERS:
+        if marker in head:
+            return marker
+    return None
+
 
 async def read_webpage_playwright(
     url: str,
     storage_state: Optional[str] = None,
     headless: bool = True,
-    timeout: int = 30
+    timeout: int = 30,
+    use_pool: bool = True,
+    block_resources: BlockRules = True,
+    wait_until: str = 'content',
+    content_selector: Optional[str] = None
 ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
     使用 Playwright 读取网页内容
@@ -31,6 +369,13 @@ async def read_webpage_playwright(
         storage_state: 已保存的登录态文件路径（JSON 格式）
         headless: 是否使用无头模式，默认 True
         timeout: 页面加载超时时间（秒），默认 30 秒
+        use_pool: 是否从浏览器池借用浏览器，默认 True（非无头模式始终单独启动）
+        block_resources: 资源拦截规则，True 为默认规则，平台名称使用平台预设，
+            dict 为自定义 {'resource_types', 'hosts'}，False 不拦截
+        wait_until: 页面就绪模式，默认 'content'（正文出现且长度稳定），
+            可选 'networkidle' / 'load' / 'domcontentloaded'
+        content_selector: 'content' 模式下等待的正文选择器，默认使用通用选择器，
+            平台选择器见 PLATFORM_CONTENT_SELECTORS
         
     Returns:
         Tuple[结果字典, 错误信息]
@@ -40,11 +385,64 @@ async def read_webpage_playwright(
     if not url or not isinstance(url, str):
         return None, "URL 不能为空"
     
+    extract_options = {
+        'block_resources': block_resources,
+        'wait_until': wait_until,
+        'content_selector': content_selector,
+    }
+    
+    # 按目标主机限流（浏览器不经过第三方服务，不设后端限流）
+    try:
+        host = urlparse(url).hostname
+    except ValueError as e:
+        return None, f"URL 格式错误: {e}"
+    limiter = get_rate_limiter()
+    if not await limiter.acquire_async('playwright', host, timeout=timeout):
+        return None, rate_limited_error(timeout)
+    
+    try:
+        if use_pool and headless:
+            pool = get_browser_pool()
+            async with pool.page(WECHAT_USER_AGENT, storage_state) as page:
+                result, throttle = await _extract_page(page, url, timeout, **extract_options)
+        else:
+            result, throttle = await _read_with_fresh_browser(
+                url, storage_state, headless, timeout, **extract_options
+            )
+    except Exception as e:
+        return None, f"Playwright 错误: {str(e)}"
+    
+    if throttle is not None:
+        status, retry_after = throttle
+        limiter.record_throttle(host=host, retry_after=retry_after)
+        return None, f"HTTP 错误 {status}: 目标站点限制访问"
+    
+    # 检查结果
+    if not result or not result.get('content'):
+        return None, "无法提取页面内容"
+    
+    marker = _verification_marker(result)
+    if marker:
+        limiter.record_throttle(host=host)
+        return None, f"页面可能包含验证机制: {marker}"
+    
+    limiter.record_success('playwright', host)
+    return result, None
+
+
+async def _read_with_fresh_browser(
+    url: str,
+    storage_state: Optional[str],
+    headless: bool,
+    timeout: int,
+    **extract_options: Any
+) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[int, Optional[float]]]]:
+    """启动独立浏览器读取页面，用完即关闭，返回值同 _extract_page()"""
     browser: Optional[Browser] = None
     context: Optional[BrowserContext] = None
     
-    try:
-        async with async_playwright() as p:
+    async with async_playwright() as p:
+        try:
             # 启动 Chromium 浏览器
             browser = await p.chromium.launch(headless=headless)
             
@@ -58,108 +456,93 @@ async def read_webpage_playwright(
                 context_options['storage_state'] = storage_state
             
             context = await browser.new_context(**context_options)
-            
-            # 创建新页面
             page = await context.new_page()
-            
-            # 设置默认超时
-            page.set_default_timeout(timeout * 1000)
-            
-            # 访问目标页面
-            await page.goto(url, wait_until='networkidle')
-            
-            # 使用 JS 提取标题和正文
-            result = await page.evaluate("""() => {
-                // 提取标题
-                const title = document.title || '';
-                
-                // 尝试提取正文内容
-                // 策略：优先查找文章主体区域
-                const articleSelectors = [
-                    'article',
-                    '[role="main"]',
-                    '.post-content',
-                    '.article-content',
-                    '.entry-content',
-                    '.content',
-                    '#content',
-                    '.rich_media_content',  // 微信公众号
-                    '.Post-RichTextContainer',  // 知乎
-                    '.note-content',  // 小红书
-                ];
-                
-                let content = '';
-                
-                for (const selector of articleSelectors) {
-                    const element = document.querySelector(selector);
-                    if (element) {
-                        content = element.innerText;
-                        break;
-                    }
-                }
-                
-                // 如果没找到，提取 body 文本
-                if (!content) {
-                    const body = document.body;
-                    if (body) {
-                        // 过滤脚本和样式标签
-                        const scripts = body.querySelectorAll('script, style, nav, header, footer, aside');
-                        scripts.forEach(el => el.remove());
-                        content = body.innerText;
-                    }
-                }
-                
-                // 提取元数据
-                const description = document.querySelector('meta[name="description"]')?.content || '';
-                const ogTitle = document.querySelector('meta[property="og:title"]')?.content || '';
-                const ogDescription = document.querySelector('meta[property="og:description"]')?.content || '';
-                
-                return {
-                    title: title,
-                    ogTitle: ogTitle,
-                    description: description,
-                    ogDescription: ogDescription,
-                    content: content.trim(),
-                    url: window.location.href
-                };
-            }""")
-            
-            await context.close()
-            await browser.close()
-            
-            # 检查结果
-            if not result or not result.get('content'):
-                return None, "无法提取页面内容"
-            
-            return result, None
-            
-    except Exception as e:
-        # 清理资源
-        if context:
-            try:
-                await context.close()
-            except:
-                pass
-        if browser:
-            try:
-                await browser.close()
-            except:
-                pass
-        return None, f"Playwright 错误: {str(e)}"
+            return await _extract_page(page, url, timeout, **extract_options)
+        finally:
+            # 清理资源
+            if context:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            if browser:
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+
+
+async def read_webpages_playwright(
+    urls: Iterable[str],
+    storage_state: Optional[str] = None,
+    concurrency: int = 4,
+    timeout: int = 30,
+    **options: Any
+) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    并发读取多个网页，共享浏览器池中的浏览器与上下文
+    
+    Args:
+        urls: 目标网页 URL 列表
+        storage_state: 已保存的登录态文件路径，所有页面共享同一上下文
+        concurrency: 同时打开的页面数量上限，默认 4
+        timeout: 单个页面加载超时时间（秒）
+        **options: 其余参数同 read_webpage_playwright()
+                   （block_resources, wait_until, content_selector）
+        
+    Yields:
+        (url, 结果字典, 错误信息)，按完成顺序产出
+    
+    最多 concurrency 个任务同时存在，完成一个才从 urls 中取下一个，
+    因此 urls 可以是很长的迭代器，内存占用不随输入数量增长。
+    """
+    limit = max(1, concurrency)
+    source = iter(urls)
+    running: Set['asyncio.Task'] = set()
+    
+    async def read_one(url: str):
+        result, error = await read_webpage_playwright(
+            url, storage_state, timeout=timeout, **options
+        )
+        return url, result, error
+    
+    def fill() -> None:
+        for url in itertools.islice(source, limit - len(running)):
+            running.add(asyncio.ensure_future(read_one(url)))
+    
+    try:
+        fill()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            running.difference_update(done)
+            # 先补足任务再产出结果，调用方处理结果时页面不空闲
+            fill()
+            for task in done:
+                yield task.result()
+    finally:
+        # 调用方提前停止迭代时取消剩余任务
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
 
 
 def read_webpage(
     url: str,
     storage_state: Optional[str] = None,
     headless: bool = True,
-    timeout: int = 30
+    timeout: int = 30,
+    **options: Any
 ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
     """
     同步封装的 Playwright 网页读取函数
     
     参数同 read_webpage_playwright()
+    
+    协程提交到 web_reader 的后台事件循环执行，浏览器池在多次调用之间保持存活，
+    进程退出时自动关闭。
     """
-    return asyncio.run(read_webpage_playwright(url, storage_state, headless, timeout))
+    return run_sync(read_webpage_playwright(url, storage_state, headless, timeout, **options))
 
 
 async def save_storage_state(
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+自适应限流
+按读取后端与目标主机分别维护令牌桶：请求成功时按加法逐步提高速率，
+遇到 429/403/验证页等限流信号时速率减半，并遵守 Retry-After（AIMD）
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple
+
+
+RATE_LIMITER_DEFAULTS: Dict[str, Any] = {
+    'enabled': True,
+    # 后端服务的初始速率（请求/秒）；未列出的后端不单独限流
+    'backend_rates': {
+        'jina': 2.0,
+        'firecrawl': 2.0,
+    },
+    # 目标主机的初始速率（请求/秒）；未列出的主机取 default_host_rate
+    'host_rates': {
+        'mp.weixin.qq.com': 0.5,
+        'www.zhihu.com': 0.5,
+        'zhuanlan.zhihu.com': 0.5,
+        'www.xiaohongshu.com': 0.5,
+    },
+    'default_host_rate': 2.0,
+    # 速率上下限（请求/秒）
+    'min_rate': 0.05,
+    'max_rate': 10.0,
+    # 每次成功增加的速率（请求/秒）
+    'additive_increase': 0.1,
+    # 令牌桶容量（允许的突发请求数）
+    'burst': 5.0,
+    # Retry-After 的上限（秒），避免异常响应头导致长时间停顿
+    'max_retry_after': 600.0,
+    # 最多保留的令牌桶数量，超出时丢弃最久未使用的桶（其速率恢复为初始值）
+    'max_buckets': 1024,
+}
+
+# 本地限流拒绝的错误信息前缀：请求未发出，不应计入策略失败或熔断
+RATE_LIMITED_ERROR = "请求过于频繁"
+
+BucketKey = Tuple[str, str]
+
+
+def rate_limited_error(timeout: Optional[float]) -> str:
+    """本地限流等待超过请求超时时返回的错误信息"""
+    return f"{RATE_LIMITED_ERROR}，限流等待超过 {timeout} 秒"
+
+
+def is_rate_limited_error(error: Optional[str]) -> bool:
+    """错误是否为本地限流拒绝（而非请求失败）"""
+    return bool(error) and error.startswith(RATE_LIMITED_ERROR)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），无法解析时返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class _Bucket:
+    """单个令牌桶（由 AdaptiveRateLimiter 加锁访问）"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """距离可取得一个令牌还需等待的秒数（需先 refill）"""
+        blocked = max(0.0, self.blocked_until - now)
+        missing = max(0.0, 1.0 - self.tokens) / self.rate
+        return max(blocked, missing)
+
+
+class AdaptiveRateLimiter:
+    """
+    按后端与目标主机限流（线程安全）
+
+    一次请求需同时从 ('backend', 后端) 与 ('host', 主机名) 两个桶各取一个令牌；
+    后端没有配置速率时只受主机桶限制。
+    """
+
+    def __init__(self, **options: Any):
+        unknown = set(options) - set(RATE_LIMITER_DEFAULTS)
+        if unknown:
+            raise ValueError(f"未知的限流配置: {', '.join(sorted(unknown))}")
+        config = {**RATE_LIMITER_DEFAULTS, **options}
+        self.enabled = config['enabled']
+        self.backend_rates = dict(config['backend_rates'])
+        self.host_rates = dict(config['host_rates'])
+        self.default_host_rate = config['default_host_rate']
+        self.min_rate = config['min_rate']
+        self.max_rate = config['max_rate']
+        self.additive_increase = config['additive_increase']
+        self.burst = max(1.0, config['burst'])
+        self.max_retry_after = config['max_retry_after']
+        self.max_buckets = max(1, config['max_buckets'])
+        self._buckets: 'OrderedDict[BucketKey, _Bucket]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket_keys(self, backend: Optional[str], host: Optional[str]) -> list:
+        keys = []
+        if backend and backend in self.backend_rates:
+            keys.append(('backend', backend))
+        if host:
+            keys.append(('host', host.lower()))
+        return keys
+
+    def _bucket(self, key: BucketKey) -> _Bucket:
+        """取得或创建令牌桶，超出 max_buckets 时丢弃最久未使用的桶（需持有锁）"""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets.move_to_end(key)
+        else:
+            kind, name = key
+            if kind == 'backend':
+                rate = self.backend_rates[name]
+            else:
+                rate = self.host_rates.get(name, self.default_host_rate)
+            rate = min(self.max_rate, max(self.min_rate, rate))
+            bucket = self._buckets[key] = _Bucket(rate, self.burst)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return bucket
+
+    def _try_take(self, keys: list) -> float:
+        """所有桶都有令牌时各取一个并返回 0，否则返回需等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            buckets = [self._bucket(key) for key in keys]
+            for bucket in buckets:
+                bucket.refill(now)
+            wait = max((bucket.wait_time(now) for bucket in buckets), default=0.0)
+            if wait <= 0:
+                for bucket in buckets:
+                    bucket.tokens -= 1.0
+                return 0.0
+            return wait
+
+    def acquire(
+        self,
+        backend: Optional[str],
+        host: Optional[str],
+        timeout: Optional[float] = None
+    ) -> bool:
+        """
+        等待并取得令牌
+
+        Args:
+            backend: 后端名称（jina / firecrawl / playwright）
+            host: 目标主机名
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            是否取得令牌（预计等待时间超过 timeout 时立即返回 False）
+        """
+        if not self.enabled:
+            return True
+        keys = self._bucket_keys(backend, host)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            wait = self._try_take(keys)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(
+        self,
+        backend: Optional[str],
+        host: Optional[str],
+        timeout: Optional[float] = None
+    ) -> bool:
+        """acquire() 的异步版本，等待期间不阻塞事件循环"""
+        if not self.enabled:
+            return True
+        keys = self._bucket_keys(backend, host)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            wait = self._try_take(keys)
+            if wait <= 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def record_success(self, backend: Optional[str], host: Optional[str]) -> None:
+        """请求成功：速率加法增加"""
+        if not self.enabled:
+            return
+        with self._lock:
+            for key in self._bucket_keys(backend, host):
+                bucket = self._bucket(key)
+                bucket.rate = min(self.max_rate, bucket.rate + self.additive_increase)
+
+    def record_throttle(
+        self,
+        backend: Optional[str] = None,
+        host: Optional[str] = None,
+        retry_after: Optional[float] = None
+    ) -> None:
+        """
+        遇到限流信号：速率减半并清空令牌，有 Retry-After 时暂停到指定时间
+
+        后端自身限流（如 Jina 返回 429）只传 backend；
+        目标站点拦截（403、验证页）只传 host。
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for key in self._bucket_keys(backend, host):
+                bucket = self._bucket(key)
+                bucket.refill(now)
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+                bucket.tokens = min(bucket.tokens, 0.0)
+                if retry_after:
+                    pause = min(retry_after, self.max_retry_after)
+                    bucket.blocked_until = max(bucket.blocked_until, now + pause)
+
+    def rate(self, backend: Optional[str] = None, host: Optional[str] = None) -> Optional[float]:
+        """当前速率（请求/秒）；backend 与 host 只应传一个"""
+        keys = self._bucket_keys(backend, host)
+        if not keys:
+            return None
+        with self._lock:
+            return self._bucket(keys[0]).rate
+
+    def stats(self) -> Dict[str, Any]:
+        """各令牌桶的当前速率与暂停剩余时间"""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                f"{kind}:{name}": {
+                    'rate': round(bucket.rate, 3),
+                    'blocked_for': round(max(0.0, bucket.blocked_until - now), 1),
+                }
+                for (kind, name), bucket in self._buckets.items()
+            }
+
+
+_default_limiter: Optional[AdaptiveRateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def configure_rate_limiter(**options: Any) -> None:
+    """
+    修改默认限流配置（会替换当前默认限流器，已学到的速率清零）
+
+    可选键见 RATE_LIMITER_DEFAULTS，如 enabled=False 关闭限流
+    """
+    global _default_limiter
+    unknown = set(options) - set(RATE_LIMITER_DEFAULTS)
+    if unknown:
+        raise ValueError(f"未知的限流配置: {', '.join(sorted(unknown))}")
+    RATE_LIMITER_DEFAULTS.update(options)
+    with _default_limiter_lock:
+        _default_limiter = None
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """获取进程内共享的默认限流器"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = AdaptiveRateLimiter()
+        return _default_limiter